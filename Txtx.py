@@ -1,15 +1,61 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import copy
 import os
 from openpyxl import load_workbook
+from openpyxl.cell.cell import MergedCell
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from copy import copy as copy_style
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
 import warnings
 
 # Suppress FutureWarning for groupby operations
 warnings.filterwarnings('ignore', category=FutureWarning, module='pandas')
 
+# Fixed vocabulary of the Final Answer values the report sections map;
+# counting happens on the integer codes of this dtype
+STATUS_CATS = pd.CategoricalDtype(['Out of stock', 'On hold', 'Not permitted',
+                                   'Request Raised', 'Action pending / In Process At HO',
+                                   'Action pending / In Process At Hub',
+                                   'Dispatch  Pending', 'Dispatch Pending',
+                                   'Delivered', 'Dispatched & In Transit', 'Return'])
+
+# bincount slot per status - slot 0 is reserved for values outside the
+# vocabulary (cat.codes of -1, shifted by +1)
+_STATUS_SLOT = {s: i + 1 for i, s in enumerate(STATUS_CATS.categories)}
+
+# One Font/Alignment instance serves every Total cell of every report;
+# openpyxl styles are immutable, so sharing them is safe and skips the
+# per-cell allocations
+_TOTAL_FONT = Font(bold=True, name='Arial', size=10)
+_CENTER_ALIGN = Alignment(horizontal='center', vertical='center')
+
+# Detected template layout (header row + column mapping), keyed by
+# (path, mtime) so the scan runs once per process per template version
+_LAYOUT_CACHE = {}
+
+def read_excel_fast(path, **kwargs):
+    """Read an Excel file with the fastest engine available.
+
+    Tries the Rust-backed calamine engine first; without it, openpyxl in
+    read-only/data-only mode streams the rows instead of materialising
+    the whole styled cell tree.
+    """
+    try:
+        return pd.read_excel(path, engine='calamine', **kwargs)
+    except ImportError:
+        return pd.read_excel(path, engine='openpyxl',
+                             engine_kwargs={'read_only': True, 'data_only': True},
+                             **kwargs)
+
+@lru_cache(maxsize=1)
+def _template_bytes(template_file):
+    """Read the template file once and hand out the raw bytes."""
+    with open(template_file, 'rb') as f:
+        return f.read()
+
 def create_zbm_hierarchical_reports():
     """
     Create separate ZBM reports showing ABM hierarchy with perfect tallies
@@ -21,7 +67,7 @@ def create_zbm_hierarchical_reports():
     # Read master tracker data from Excel file
     print("📖 Reading Demo File 1.xlsx...")
     try:
-        df = pd.read_excel('ZBM Automation Email 2410252.xlsx')
+        df = read_excel_fast('ZBM Automation Email 2410252.xlsx')
         print(f"✅ Successfully loaded {len(df)} records")
     except Exception as e:
         print(f"❌ Error reading file: {e}")
@@ -59,6 +105,17 @@ def create_zbm_hierarchical_reports():
         print(f"❌ Missing required columns: {missing}")
         return
 
+    # The hierarchy and reason columns repeat a handful of labels over
+    # thousands of rows - as category dtype the groupbys and filters below
+    # compare small integer codes instead of strings
+    category_columns = ['ZBM Terr Code', 'ZBM Name', 'ZBM EMAIL_ID',
+                        'ABM Terr Code', 'ABM Name', 'ABM EMAIL_ID',
+                        'TBM HQ', 'TBM EMAIL_ID', 'Rto Reason', tbm_created_by_col]
+    if 'ABM HQ' in df.columns:
+        category_columns.append('ABM HQ')
+    for col in dict.fromkeys(category_columns):
+        df[col] = df[col].astype('category')
+
     print(f"📊 Total rows in file: {len(df)}")
     print(f"📊 Unique Request IDs in raw data: {df['Assigned Request Ids'].nunique()}")
     print(f"📊 Unique ZBM codes in raw data: {df['ZBM Terr Code'].nunique()}")
@@ -66,30 +123,30 @@ def create_zbm_hierarchical_reports():
     # Compute Final Answer per unique request id using rules from logic.xlsx
     print("🧠 Computing final status per unique Request Id using rules...")
     try:
-        xls_rules = pd.ExcelFile('logic.xlsx')
-        sheet2 = pd.read_excel(xls_rules, 'Sheet2')
+        sheet2 = read_excel_fast('logic.xlsx', sheet_name='Sheet2')
 
         def normalize(text):
             return str(text).strip().casefold()
 
+        # Each rule's status set becomes a canonical '|'-joined key; the
+        # request side builds the identical key, so lookup is one Series.map
         rules = {}
         for _, row in sheet2.iterrows():
-            statuses = [normalize(s) for s in row.drop('Final Answer').dropna().tolist()]
-            statuses = tuple(sorted(set(statuses)))
-            rules[statuses] = row['Final Answer']
-
-        # Group statuses by request id from master data
-        grouped = df.groupby('Assigned Request Ids')['Request Status'].apply(list).reset_index()
-
-        def get_final_answer(status_list):
-            key = tuple(sorted(set(normalize(s) for s in status_list)))
-            return rules.get(key, '❌ No matching rule')
+            statuses = sorted(set(normalize(s) for s in row.drop('Final Answer').dropna()))
+            rules['|'.join(statuses)] = row['Final Answer']
 
-        grouped['Request Status'] = grouped['Request Status'].apply(lambda lst: sorted(set(lst), key=str))
-        grouped['Final Answer'] = grouped['Request Status'].apply(get_final_answer)
+        # Normalize the whole status column once, collapse each request id
+        # to its distinct statuses with the Cython-level unique(), then
+        # join the small per-request arrays into canonical keys
+        status_norm = df['Request Status'].astype(str).str.strip().str.casefold()
+        grouped_statuses = status_norm.groupby(df['Assigned Request Ids']).unique()
+        request_keys = pd.Series(['|'.join(sorted(a)) for a in grouped_statuses.to_numpy()],
+                                 index=grouped_statuses.index)
+        final_answers = request_keys.map(rules).fillna('❌ No matching rule')
 
-        # Merge Final Answer back to main dataframe
-        df = df.merge(grouped[['Assigned Request Ids', 'Final Answer']], on='Assigned Request Ids', how='left')
+        # Attach Final Answer back to the main dataframe; the handful of
+        # distinct answers make it another natural category column
+        df['Final Answer'] = df['Assigned Request Ids'].map(final_answers).astype('category')
         
         # Check for unmapped requests
         unmapped_count = (df['Final Answer'] == '❌ No matching rule').sum()
@@ -128,19 +185,49 @@ def create_zbm_hierarchical_reports():
     if 'ABM HQ' in df.columns:
         agg_dict['ABM HQ'] = 'first'
     
-    df_dedup = df.groupby(['Assigned Request Ids', 'ZBM Terr Code', 'ABM Terr Code']).agg(agg_dict).reset_index()
+    # sort=False skips a key sort nothing downstream depends on
+    df_dedup = df.groupby(['Assigned Request Ids', 'ZBM Terr Code', 'ABM Terr Code'],
+                          sort=False, observed=True).agg(agg_dict).reset_index()
     
+    # Normalize the RTO reason text once for the whole deduplicated frame;
+    # the per-ABM categorization below just slices this column instead of
+    # re-running astype/strip/lower on every slice
+    df_dedup['_rto_lc'] = df_dedup['Rto Reason'].astype(str).str.strip().str.lower()
+
+    # Integer-code the Final Answer against the fixed vocabulary once;
+    # statuses outside it code to -1 and land in the unmapped slot
+    df_dedup['_fa'] = df_dedup['Final Answer'].astype(STATUS_CATS).cat.codes
+
     print(f"📊 Deduplicated from {len(df)} rows to {len(df_dedup)} unique (Request ID + ZBM + ABM) combinations")
     print(f"📊 Unique Request IDs after dedup: {df_dedup['Assigned Request Ids'].nunique()}")
     
-    # Get unique ZBMs using mode (most frequent) for name/email
-    zbms = df_dedup.groupby('ZBM Terr Code').agg({
-        'ZBM Name': lambda x: x.mode()[0] if len(x.mode()) > 0 else x.iloc[0],
-        'ZBM EMAIL_ID': lambda x: x.mode()[0] if len(x.mode()) > 0 else x.iloc[0]
-    }).reset_index().sort_values('ZBM Terr Code')
+    # Get unique ZBMs - one (name, email) pair per code. A few codes carry
+    # more than one spelling of the name in the source, where the old
+    # per-group mode() picked the most frequent one; drop_duplicates keeps
+    # a single pair instead, and sorting on all three columns first makes
+    # that pick deterministic rather than dependent on row order
+    zbms = (df_dedup[['ZBM Terr Code', 'ZBM Name', 'ZBM EMAIL_ID']]
+            .sort_values(['ZBM Terr Code', 'ZBM Name', 'ZBM EMAIL_ID'])
+            .drop_duplicates('ZBM Terr Code'))
     
     print(f"📋 Found {len(zbms)} unique ZBMs")
-    
+
+    # Split the dedup frame per ZBM and per (ZBM, ABM) once up front; the
+    # loops below pull ready-made slices out of these dicts instead of
+    # running a boolean filter plus copy over the whole frame each time
+    # All three per-ABM uniqueness metrics in one grouped pass; the inner
+    # loop reads a row of this table instead of running three separate
+    # nunique scans per ABM
+    uniq_counts = df_dedup.groupby(['ZBM Terr Code', 'ABM Terr Code', 'ABM Name'],
+                                   observed=True).agg(
+        unique_tbms=(tbm_created_by_col, 'nunique'),
+        unique_hcps=('Doctor: Customer Code', 'nunique'),
+        unique_requests=('Assigned Request Ids', 'nunique'))
+
+    zbm_groups = dict(iter(df_dedup.groupby('ZBM Terr Code', observed=True, sort=False)))
+    abm_groups = dict(iter(df_dedup.groupby(['ZBM Terr Code', 'ABM Terr Code', 'ABM Name'],
+                                            observed=True, sort=False)))
+
     # Debug: Check for any duplicates
     duplicate_codes = zbms['ZBM Terr Code'].value_counts()
     if len(duplicate_codes[duplicate_codes > 1]) > 0:
@@ -149,10 +236,9 @@ def create_zbm_hierarchical_reports():
     
     # Debug: Show first few ZBMs and their ABMs
     print("\n🔍 ZBM-ABM Mapping (first 5):")
-    for idx, (_, zbm_row) in enumerate(zbms.head(5).iterrows()):
-        zbm_code = zbm_row['ZBM Terr Code']
-        zbm_name = zbm_row['ZBM Name']
-        zbm_data_temp = df_dedup[df_dedup['ZBM Terr Code'] == zbm_code]
+    for idx, (zbm_code, zbm_name) in enumerate(zip(zbms['ZBM Terr Code'].head(5),
+                                                   zbms['ZBM Name'].head(5))):
+        zbm_data_temp = zbm_groups[zbm_code]
         abms_temp = zbm_data_temp[['ABM Terr Code', 'ABM Name']].drop_duplicates()
         requests_temp = zbm_data_temp['Assigned Request Ids'].nunique()
         print(f"   {idx+1}. {zbm_code} ({zbm_name}): {len(abms_temp)} ABMs, {requests_temp} requests")
@@ -163,127 +249,121 @@ def create_zbm_hierarchical_reports():
     os.makedirs(output_dir, exist_ok=True)
     print(f"📁 Created output directory: {output_dir}")
     
-    # Process each ZBM
-    file_count = 0
+    # Process each ZBM - the summaries are computed here, the actual Excel
+    # writes are queued up and dispatched to worker processes afterwards
+    report_jobs = []
     total_validation_errors = 0
     
-    for _, zbm_row in zbms.iterrows():
-        zbm_code = zbm_row['ZBM Terr Code']
-        zbm_name = zbm_row['ZBM Name']
-        zbm_email = zbm_row['ZBM EMAIL_ID']
-        
+    # Drive the loop off plain arrays - iterrows would build a Series per
+    # ZBM just to read three fields back out of it
+    for zbm_code, zbm_name, zbm_email in zip(zbms['ZBM Terr Code'].to_numpy(),
+                                             zbms['ZBM Name'].to_numpy(),
+                                             zbms['ZBM EMAIL_ID'].to_numpy()):
         print(f"\n📄 Processing ZBM: {zbm_code} - {zbm_name}")
         
-        # Filter data for this ZBM (using deduplicated data)
-        zbm_data = df_dedup[df_dedup['ZBM Terr Code'] == zbm_code].copy()
-        
-        if len(zbm_data) == 0:
+        # Pick up the precomputed slice for this ZBM - nothing below
+        # mutates it, so no defensive copy either
+        zbm_data = zbm_groups.get(zbm_code)
+
+        if zbm_data is None or len(zbm_data) == 0:
             print(f"No data found for ZBM: {zbm_code}")
             continue
         
-        # Get unique ABMs under this ZBM
-        abms = zbm_data.groupby(['ABM Terr Code', 'ABM Name']).agg({
-            'ABM EMAIL_ID': lambda x: x.mode()[0] if len(x.mode()) > 0 else x.iloc[0],
-            'TBM HQ': 'first',
-            'ABM HQ': 'first' if 'ABM HQ' in zbm_data.columns else lambda x: None
-        }).reset_index()
-        
+        # Get unique ABMs under this ZBM - first occurrence per
+        # (code, name) pair, same replacement of the mode() lambdas
+        abm_cols = ['ABM Terr Code', 'ABM Name', 'ABM EMAIL_ID', 'TBM HQ']
+        if 'ABM HQ' in zbm_data.columns:
+            abms = zbm_data[abm_cols + ['ABM HQ']].drop_duplicates(['ABM Terr Code', 'ABM Name'])
+        else:
+            abms = zbm_data[abm_cols].drop_duplicates(['ABM Terr Code', 'ABM Name'])
+            abms = abms.assign(**{'ABM HQ': None})
+
         abms = abms.sort_values('ABM Terr Code')
         print(f"   📊 Found {len(abms)} ABMs under this ZBM")
         
         # Create summary data for this ZBM
         summary_data = []
         
-        for _, abm_row in abms.iterrows():
-            abm_code = abm_row['ABM Terr Code']
-            abm_name = abm_row['ABM Name']
-            abm_email = abm_row['ABM EMAIL_ID']
-            tbm_hq = abm_row['TBM HQ']
-            
-            # Filter data for this specific ABM (using deduplicated data)
-            abm_data = zbm_data[(zbm_data['ABM Terr Code'] == abm_code) & 
-                               (zbm_data['ABM Name'] == abm_name)].copy()
-            
-            # Calculate all metrics using deduplicated data
-            # Use the dynamically found TBM created by column
-            unique_tbms = abm_data[tbm_created_by_col].nunique()
-            unique_hcps = abm_data['Doctor: Customer Code'].nunique()
-            unique_requests = len(abm_data)
+        # Same array-driven iteration for the inner ABM loop
+        for abm_code, abm_name, abm_email, tbm_hq, abm_hq_val in zip(
+                abms['ABM Terr Code'].to_numpy(), abms['ABM Name'].to_numpy(),
+                abms['ABM EMAIL_ID'].to_numpy(), abms['TBM HQ'].to_numpy(),
+                abms['ABM HQ'].to_numpy()):
+
+            # Precomputed slice for this specific ABM (deduplicated data)
+            abm_data = abm_groups[(zbm_code, abm_code, abm_name)]
             
+            # Calculate all metrics using deduplicated data - the
+            # uniqueness numbers come from the precomputed table
+            abm_uniques = uniq_counts.loc[(zbm_code, abm_code, abm_name)]
+            unique_tbms = int(abm_uniques['unique_tbms'])
+            unique_hcps = int(abm_uniques['unique_hcps'])
+            unique_requests = int(abm_uniques['unique_requests'])
+
+            # One bincount over the ABM's shifted status codes yields every
+            # section counter; the slices below just read slots out of it
+            status_counts = np.bincount(abm_data['_fa'].to_numpy() + 1,
+                                        minlength=len(STATUS_CATS.categories) + 1)
+
+            def count_of(statuses):
+                return int(sum(status_counts[_STATUS_SLOT[s]] for s in statuses))
+
             # === SECTION A: Request Cancelled Out of Stock ===
             # Final Answer: Out of stock, On hold, Not permitted
-            ho_statuses = ['Out of stock', 'On hold', 'Not permitted']
-            request_cancelled_out_of_stock = (abm_data['Final Answer'].isin(ho_statuses)).sum()
-            
+            request_cancelled_out_of_stock = count_of(['Out of stock', 'On hold', 'Not permitted'])
+
             # === SECTION B: Action Pending at HO ===
             # Final Answer: Request Raised, Action pending / In Process At HO
-            pending_statuses = ['Request Raised', 'Action pending / In Process At HO']
-            action_pending_at_ho = (abm_data['Final Answer'].isin(pending_statuses)).sum()
-            
+            action_pending_at_ho = count_of(['Request Raised', 'Action pending / In Process At HO'])
+
             # === SECTION D: Pending for Invoicing ===
             # Final Answer: Action pending / In Process At Hub
-            hub_pending_statuses = ['Action pending / In Process At Hub']
-            pending_for_invoicing = (abm_data['Final Answer'].isin(hub_pending_statuses)).sum()
-            
+            pending_for_invoicing = count_of(['Action pending / In Process At Hub'])
+
             # === SECTION E: Pending for Dispatch ===
             # Final Answer: Dispatch Pending
-            dispatch_pending_statuses = ['Dispatch  Pending', 'Dispatch Pending']
-            pending_for_dispatch = (abm_data['Final Answer'].isin(dispatch_pending_statuses)).sum()
-            
+            pending_for_dispatch = count_of(['Dispatch  Pending', 'Dispatch Pending'])
+
             # === SECTION G: Delivered ===
             # Final Answer: Delivered
-            delivered_statuses = ['Delivered']
-            delivered = (abm_data['Final Answer'].isin(delivered_statuses)).sum()
-            
+            delivered = count_of(['Delivered'])
+
             # === SECTION H: Dispatched & In Transit ===
             # Final Answer: Dispatched & In Transit
-            transit_statuses = ['Dispatched & In Transit']
-            dispatched_in_transit = (abm_data['Final Answer'].isin(transit_statuses)).sum()
-            
+            dispatched_in_transit = count_of(['Dispatched & In Transit'])
+
             # === SECTION I: RTO (Return to Origin) ===
             # RTO Total: ONLY count requests with "Return" Final Answer
-            has_return_status = abm_data['Final Answer'] == 'Return'
-            rto_total = has_return_status.sum()
+            rto_total = count_of(['Return'])
             
             # RTO Reasons: Count based on unique Request IDs that have RTO reasons
             # INDEPENDENT of Final Answer status - based on Rto Reason column only
             # Each unique Request ID is counted in ONLY ONE category based on priority
-            
-            # Get unique Request IDs for this ABM (regardless of Final Answer)
-            unique_request_ids = abm_data['Assigned Request Ids'].unique()
-            
-            # For each unique Request ID, determine its RTO reason category based on priority
-            incomplete_address = 0
-            doctor_refused_to_accept = 0
-            doctor_non_contactable = 0
-            rto_due_to_hold_delivery = 0
-        
 
-            
-            for req_id in unique_request_ids:
-                # Get all rows for this Request ID under this ABM
-                req_rows = abm_data[abm_data['Assigned Request Ids'] == req_id]
-                
-                # Check RTO reasons in the Rto Reason column (check all rows for this request)
-                rto_col = req_rows['Rto Reason'].astype(str).str.strip().str.lower()
-                
-                # Check which reasons are present for this Request ID
-                has_incomplete = rto_col.str.contains('incomplete address', na=False, regex=False).any()
-                has_refused = rto_col.str.contains('refused to accept', na=False, regex=False).any()
-                has_non_contactable = rto_col.str.contains('non contactable', na=False, regex=False).any()
-                has_rto_hold_delivery = rto_col.str.contains('hold delivery', na=False, regex=False).any()
-
-                # Assign to EXACTLY ONE category based on priority
-                # Priority: 1) Incomplete Address, 2) Doctor Refused, 3) Doctor Non Contactable
-                if has_incomplete:
-                    incomplete_address += 1
-                elif has_refused:
-                    doctor_refused_to_accept += 1
-                elif has_non_contactable:
-                    doctor_non_contactable += 1
-                elif has_rto_hold_delivery:
-                    rto_due_to_hold_delivery +=1
-                # If no RTO reason found, don't count in any category
+            # Flag all four reasons across the ABM's rows in one pass, then
+            # collapse to one row per Request ID (any row carrying a reason
+            # marks the whole request) - no per-request filtering needed
+            rto_col = abm_data['_rto_lc']
+            reason_flags = pd.DataFrame({
+                'incomplete': rto_col.str.contains('incomplete address', na=False, regex=False),
+                'refused': rto_col.str.contains('refused to accept', na=False, regex=False),
+                'non_contactable': rto_col.str.contains('non contactable', na=False, regex=False),
+                'hold_delivery': rto_col.str.contains('hold delivery', na=False, regex=False),
+            })
+            req_flags = reason_flags.groupby(abm_data['Assigned Request Ids'].values).any()
+
+            # Assign each request to EXACTLY ONE category based on priority:
+            # 1) Incomplete Address, 2) Doctor Refused, 3) Doctor Non
+            # Contactable, 4) Hold Delivery - masking out higher priorities
+            # reproduces the old if/elif cascade
+            not_incomplete = ~req_flags['incomplete']
+            not_refused = not_incomplete & ~req_flags['refused']
+            incomplete_address = int(req_flags['incomplete'].sum())
+            doctor_refused_to_accept = int((not_incomplete & req_flags['refused']).sum())
+            doctor_non_contactable = int((not_refused & req_flags['non_contactable']).sum())
+            rto_due_to_hold_delivery = int((not_refused & ~req_flags['non_contactable']
+                                            & req_flags['hold_delivery']).sum())
+            # Requests with no RTO reason fall through every mask uncounted
             
             # Validate RTO breakdown
             rto_reasons_sum = incomplete_address + doctor_non_contactable + doctor_refused_to_accept + rto_due_to_hold_delivery
@@ -307,15 +387,15 @@ def create_zbm_hierarchical_reports():
             # Hold Delivery (not used in current logic)
             hold_delivery = 0
             
-            # Check for unmapped requests
-            all_mapped_statuses = ho_statuses + pending_statuses + hub_pending_statuses + dispatch_pending_statuses + delivered_statuses + transit_statuses + ['Return']
-            mapped = abm_data['Final Answer'].isin(all_mapped_statuses)
-            unmapped_count = (~mapped).sum()
-            
+            # Check for unmapped requests - everything coded -1 fell into
+            # the reserved slot; names are only resolved when needed
+            unmapped_count = int(status_counts[0])
+
             if unmapped_count > 0:
                 print(f"      {unmapped_count} unmapped requests for ABM {abm_code}")
-                unmapped_statuses = abm_data[~mapped]['Final Answer'].value_counts().to_dict()
-                print(f"         Unmapped statuses: {unmapped_statuses}")
+                unmapped_statuses = abm_data.loc[abm_data['_fa'].to_numpy() == -1, 'Final Answer'].value_counts()
+                unmapped_statuses = unmapped_statuses[unmapped_statuses > 0]
+                print(f"         Unmapped statuses: {unmapped_statuses.to_dict()}")
             
             # Verify tally
             if requests_raised_calc != unique_requests:
@@ -330,8 +410,8 @@ def create_zbm_hierarchical_reports():
             requests_raised = unique_requests
             
             # Create Area Name
-            if 'ABM HQ' in abm_row and pd.notna(abm_row['ABM HQ']):
-                abm_hq = abm_row['ABM HQ']
+            if pd.notna(abm_hq_val):
+                abm_hq = abm_hq_val
             else:
                 abm_hq = tbm_hq
             area_name = f"{abm_code} - {abm_hq}"
@@ -370,10 +450,20 @@ def create_zbm_hierarchical_reports():
             print(f"      Summary total: {zbm_summary_total}")
             print(f"      Difference: {zbm_summary_total - zbm_total_requests}")
         
-        # Create Excel file for this ZBM
-        create_zbm_excel_report(zbm_code, zbm_name, zbm_email, zbm_summary_df, output_dir)
-        file_count += 1
-    
+        # Queue the Excel write for this ZBM
+        report_jobs.append((zbm_code, zbm_name, zbm_email, zbm_summary_df))
+
+    # The reports are independent of each other, so the openpyxl fill/save
+    # work - the expensive part - runs across all cores; the shared
+    # timestamp keeps one consistent date tag in every filename
+    with ProcessPoolExecutor() as executor:
+        futures = [executor.submit(create_zbm_excel_report, zbm_code, zbm_name,
+                                   zbm_email, summary_df, output_dir, timestamp)
+                   for zbm_code, zbm_name, zbm_email, summary_df in report_jobs]
+        # The worker returns the filename on success and None on failure,
+        # so the banner reflects files actually written, not jobs queued
+        file_count = sum(1 for future in futures if future.result() is not None)
+
     print(f"\n🎉 Successfully created {file_count} ZBM reports in directory: {output_dir}")
     print(f"📊 Total ZBMs processed: {file_count}")
     if total_validation_errors > 0:
@@ -381,134 +471,152 @@ def create_zbm_hierarchical_reports():
     else:
         print(f"✅ All tallies match perfectly!")
 
-def create_zbm_excel_report(zbm_code, zbm_name, zbm_email, summary_df, output_dir):
+def create_zbm_excel_report(zbm_code, zbm_name, zbm_email, summary_df, output_dir, date_tag=None):
     """Create Excel report for a specific ZBM with perfect formatting"""
+
+    # Pool workers get the batch's shared tag; a direct call still works
+    if date_tag is None:
+        date_tag = datetime.now().strftime('%Y%m%d')
     
     try:
-        # Load template
-        wb = load_workbook('zbm_summary.xlsx')
+        # Load template - the bytes are read from disk once per process and
+        # reparsed from memory for every ZBM
+        template_file = 'zbm_summary.xlsx'
+        wb = load_workbook(BytesIO(_template_bytes(template_file)))
         ws = wb['ZBM']
 
-        def get_cell_value_handling_merged(row, col):
-            """Get cell value even if it's part of a merged cell"""
-            cell = ws.cell(row=row, column=col)
-            
-            # Check if this cell is part of a merged range
-            for merged_range in ws.merged_cells.ranges:
-                if cell.coordinate in merged_range:
-                    # Get the top-left cell of the merged range
-                    top_left_cell = ws.cell(row=merged_range.min_row, column=merged_range.min_col)
-                    return top_left_cell.value
-            
-            return cell.value
-        
-        # Search for header row
-        header_row = None
-        for row_idx in range(1, 15):
-            for col_idx in range(1, min(30, ws.max_column + 1)):
-                cell_value = get_cell_value_handling_merged(row_idx, col_idx)
-                if cell_value and 'Area Name' in str(cell_value):
-                    header_row = row_idx
+        # The header row and column positions only depend on the template,
+        # so they are detected once and cached against the file mtime
+        layout_key = (template_file, os.path.getmtime(template_file))
+        layout = _LAYOUT_CACHE.get(layout_key)
+        if layout is None:
+            # Flatten the merged ranges into a (row, col) -> top-left value
+            # dict up front; every probe during the scan is then a dict hit
+            # instead of a walk over the whole range list
+            merged_values = {}
+            for merged_range in list(ws.merged_cells.ranges):
+                top_left_value = ws.cell(row=merged_range.min_row, column=merged_range.min_col).value
+                for m_row in range(merged_range.min_row, merged_range.max_row + 1):
+                    for m_col in range(merged_range.min_col, merged_range.max_col + 1):
+                        merged_values[(m_row, m_col)] = top_left_value
+
+            def get_cell_value_handling_merged(row, col):
+                """Get cell value even if it's part of a merged cell"""
+                if (row, col) in merged_values:
+                    return merged_values[(row, col)]
+                return ws.cell(row=row, column=col).value
+
+            # Search for header row
+            header_row = None
+            for row_idx in range(1, 15):
+                for col_idx in range(1, min(30, ws.max_column + 1)):
+                    cell_value = get_cell_value_handling_merged(row_idx, col_idx)
+                    if cell_value and 'Area Name' in str(cell_value):
+                        header_row = row_idx
+                        break
+                if header_row:
                     break
-            if header_row:
-                break
-        
-        if header_row is None:
-            header_row = 7
-        
+
+            if header_row is None:
+                header_row = 7
+
+            # Read actual column positions from template header row
+            column_mapping = {}
+            for col_idx in range(1, min(30, ws.max_column + 1)):
+                header_val = get_cell_value_handling_merged(header_row, col_idx)
+                if header_val:
+                    header_str = str(header_val).strip()
+
+                    if 'Area Name' in header_str:
+                        column_mapping['Area Name'] = col_idx
+                    elif 'ABM Name' in header_str:
+                        column_mapping['ABM Name'] = col_idx
+                    elif 'Unique TBMs' in header_str or '# Unique TBMs' in header_str:
+                        column_mapping['Unique TBMs'] = col_idx
+                    elif 'Unique HCPs' in header_str or '# Unique HCPs' in header_str:
+                        column_mapping['Unique HCPs'] = col_idx
+                    elif 'Requests Raised' in header_str or '# Requests Raised' in header_str:
+                        column_mapping['Requests Raised'] = col_idx
+                    elif 'Request Cancelled' in header_str or 'Out of Stock' in header_str:
+                        column_mapping['Request Cancelled Out of Stock'] = col_idx
+                    elif 'Action pending' in header_str and 'HO' in header_str:
+                        column_mapping['Action Pending at HO'] = col_idx
+                    elif 'Sent to HUB' in header_str:
+                        column_mapping['Sent to HUB'] = col_idx
+                    elif 'Pending for Invoicing' in header_str:
+                        column_mapping['Pending for Invoicing'] = col_idx
+                    elif 'Pending for Dispatch' in header_str:
+                        column_mapping['Pending for Dispatch'] = col_idx
+                    elif 'Requests Dispatched' in header_str or '# Requests Dispatched' in header_str:
+                        column_mapping['Requests Dispatched'] = col_idx
+                    elif header_str == 'Delivered' or 'Delivered (G)' in header_str:
+                        column_mapping['Delivered'] = col_idx
+                    elif 'Dispatched & In Transit' in header_str or 'Dispatched In Transit' in header_str:
+                        column_mapping['Dispatched In Transit'] = col_idx
+                    elif header_str == 'RTO' or 'RTO (I)' in header_str:
+                        column_mapping['RTO'] = col_idx
+                    elif 'Incomplete Address' in header_str:
+                        column_mapping['Incomplete Address'] = col_idx
+                    elif 'Doctor Non Contactable' in header_str or 'Dr. Non contactable' in header_str:
+                        column_mapping['Doctor Non Contactable'] = col_idx
+                    elif 'Doctor Refused' in header_str or 'Refused to Accept' in header_str:
+                        column_mapping['Doctor Refused to Accept'] = col_idx
+                    elif 'Hold Delivery' in header_str:
+                        column_mapping['Hold Delivery'] = col_idx
+
+            layout = (header_row, column_mapping)
+            _LAYOUT_CACHE[layout_key] = layout
+
+        header_row, column_mapping = layout
         data_start_row = header_row + 1
-        
-        # Read actual column positions from template header row
-        column_mapping = {}
-        for col_idx in range(1, min(30, ws.max_column + 1)):
-            header_val = get_cell_value_handling_merged(header_row, col_idx)
-            if header_val:
-                header_str = str(header_val).strip()
-                
-                if 'Area Name' in header_str:
-                    column_mapping['Area Name'] = col_idx
-                elif 'ABM Name' in header_str:
-                    column_mapping['ABM Name'] = col_idx
-                elif 'Unique TBMs' in header_str or '# Unique TBMs' in header_str:
-                    column_mapping['Unique TBMs'] = col_idx
-                elif 'Unique HCPs' in header_str or '# Unique HCPs' in header_str:
-                    column_mapping['Unique HCPs'] = col_idx
-                elif 'Requests Raised' in header_str or '# Requests Raised' in header_str:
-                    column_mapping['Requests Raised'] = col_idx
-                elif 'Request Cancelled' in header_str or 'Out of Stock' in header_str:
-                    column_mapping['Request Cancelled Out of Stock'] = col_idx
-                elif 'Action pending' in header_str and 'HO' in header_str:
-                    column_mapping['Action Pending at HO'] = col_idx
-                elif 'Sent to HUB' in header_str:
-                    column_mapping['Sent to HUB'] = col_idx
-                elif 'Pending for Invoicing' in header_str:
-                    column_mapping['Pending for Invoicing'] = col_idx
-                elif 'Pending for Dispatch' in header_str:
-                    column_mapping['Pending for Dispatch'] = col_idx
-                elif 'Requests Dispatched' in header_str or '# Requests Dispatched' in header_str:
-                    column_mapping['Requests Dispatched'] = col_idx
-                elif header_str == 'Delivered' or 'Delivered (G)' in header_str:
-                    column_mapping['Delivered'] = col_idx
-                elif 'Dispatched & In Transit' in header_str or 'Dispatched In Transit' in header_str:
-                    column_mapping['Dispatched In Transit'] = col_idx
-                elif header_str == 'RTO' or 'RTO (I)' in header_str:
-                    column_mapping['RTO'] = col_idx
-                elif 'Incomplete Address' in header_str:
-                    column_mapping['Incomplete Address'] = col_idx
-                elif 'Doctor Non Contactable' in header_str or 'Dr. Non contactable' in header_str:
-                    column_mapping['Doctor Non Contactable'] = col_idx
-                elif 'Doctor Refused' in header_str or 'Refused to Accept' in header_str:
-                    column_mapping['Doctor Refused to Accept'] = col_idx
-                elif 'Hold Delivery' in header_str:
-                    column_mapping['Hold Delivery'] = col_idx
-        
-        # Clear existing data rows
-        max_clear_rows = max(len(summary_df) + 10, 50)
-        for r in range(data_start_row, data_start_row + max_clear_rows):
-            for c in range(1, ws.max_column + 1):
-                try:
-                    cell = ws.cell(row=r, column=c)
-                    cell.value = None
-                except:
-                    pass
+
+        # Clear existing data rows - only the rectangle the template
+        # actually populates; writing None past ws.max_row would just
+        # allocate empty cells. iter_rows streams the region in one pass
+        # instead of a ws.cell() probe per coordinate
+        if ws.max_row >= data_start_row:
+            for row_cells in ws.iter_rows(min_row=data_start_row, max_row=ws.max_row):
+                for cell in row_cells:
+                    if not isinstance(cell, MergedCell):
+                        cell.value = None
 
         def copy_row_style(src_row_idx, dst_row_idx):
             """Copy formatting from source row to destination row"""
-            for c in range(1, ws.max_column + 1):
-                try:
-                    src = ws.cell(row=src_row_idx, column=c)
-                    dst = ws.cell(row=dst_row_idx, column=c)
-                    
-                    if src.font:
-                        dst.font = copy_style(src.font)
-                    if src.alignment:
-                        dst.alignment = copy_style(src.alignment)
-                    if src.border:
-                        dst.border = copy_style(src.border)
-                    if src.fill:
-                        dst.fill = copy_style(src.fill)
-                    dst.number_format = src.number_format
-                except:
-                    pass
+            # The style accessors return a read-only StyleProxy that the
+            # setters reject at save time; copy.copy unwraps it into a
+            # real style object
+            for src, dst in zip(ws[src_row_idx], ws[dst_row_idx]):
+                if src.font:
+                    dst.font = copy.copy(src.font)
+                if src.alignment:
+                    dst.alignment = copy.copy(src.alignment)
+                if src.border:
+                    dst.border = copy.copy(src.border)
+                if src.fill:
+                    dst.fill = copy.copy(src.fill)
+                dst.number_format = src.number_format
 
-        # Write data rows
+        # Write data rows - resolve each mapped column to its position in
+        # the frame once, then stream the rows as plain tuples; the old loop
+        # paid an iloc label lookup for every single cell
         template_data_row = data_start_row
-        for i in range(len(summary_df)):
+        write_columns = [(col_idx, summary_df.columns.get_loc(col_name))
+                         for col_name, col_idx in column_mapping.items()
+                         if col_name in summary_df.columns]
+        for i, row in enumerate(summary_df.itertuples(index=False, name=None)):
             target_row = data_start_row + i
-            copy_row_style(template_data_row, target_row)
-            
-            for col_name, col_idx in column_mapping.items():
-                if col_name in summary_df.columns:
-                    value = summary_df.iloc[i][col_name]
-                    
-                    try:
-                        cell = ws.cell(row=target_row, column=col_idx)
-                        cell.value = value
-                        
-                        if isinstance(value, (int, float)) and not pd.isna(value):
-                            cell.number_format = '0'
-                    except:
-                        pass
+            # The first data row IS the template row - copying its style
+            # onto itself is pure wasted work
+            if target_row != template_data_row:
+                copy_row_style(template_data_row, target_row)
+
+            for col_idx, pos in write_columns:
+                value = row[pos]
+                cell = ws.cell(row=target_row, column=col_idx)
+                cell.value = value
+
+                if isinstance(value, (int, float)) and not pd.isna(value):
+                    cell.number_format = '0'
 
         # Add total row
         total_row = data_start_row + len(summary_df)
@@ -518,8 +626,8 @@ def create_zbm_excel_report(zbm_code, zbm_name, zbm_email, summary_df, output_di
             try:
                 cell = ws.cell(row=total_row, column=column_mapping['ABM Name'])
                 cell.value = "Total"
-                cell.font = Font(bold=True, name='Arial', size=10)
-                cell.alignment = Alignment(horizontal='center', vertical='center')
+                cell.font = _TOTAL_FONT
+                cell.alignment = _CENTER_ALIGN
             except:
                 pass
         
@@ -539,16 +647,18 @@ def create_zbm_excel_report(zbm_code, zbm_name, zbm_email, summary_df, output_di
 
         # Save file
         safe_zbm_name = str(zbm_name).replace(' ', '_').replace('/', '_').replace('\\', '_')
-        filename = f"ZBM_Summary_{zbm_code}_{safe_zbm_name}_{datetime.now().strftime('%Y%m%d')}.xlsx"
+        filename = f"ZBM_Summary_{zbm_code}_{safe_zbm_name}_{date_tag}.xlsx"
         filepath = os.path.join(output_dir, filename)
         
         wb.save(filepath)
         print(f"   ✅ Created: {filename}")
-        
+        return filename
+
     except Exception as e:
         print(f"   ❌ Error creating Excel report for {zbm_code}: {e}")
         import traceback
         traceback.print_exc()
+        return None
 
 if __name__ == "__main__":
     create_zbm_hierarchical_reports()
@@ -6,25 +6,270 @@ Creates detailed consolidated files for each TBM Division with specific columns
 
 import pandas as pd
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
 import warnings
 
 # Suppress pandas warnings
 warnings.filterwarnings('ignore', category=FutureWarning, module='pandas')
 
+# Date columns that get a dd/mm/yyyy display format in the output files
+DATE_COLUMNS = ['Date', 'Invoice Date', 'Dispatch Date', 'Delivery Date']
+
+# Identifier-ish columns hold mixed int/str values in the workbook
+# ('Invoice #' especially); reading them as strings keeps the frame
+# Parquet-serializable so the sidecar cache can actually be written
+ID_COLUMNS = ['Assigned Request Ids', 'Doctor: SAP Customer Code(New)', 'Doctor: Customer Code',
+              'Item Code', 'Invoice #', 'Docket Number', 'ZBM Terr Code', 'ABM Terr Code']
+
+# Opt-in diagnostics - the value_counts scans and per-row sample prints are
+# pure overhead in production runs
+VERBOSE = os.getenv('ZBM_DEBUG') == '1'
+
+# Rows streamed to the Excel writers per slice, so very large Divisions
+# keep peak memory bounded
+WRITE_CHUNK_ROWS = 50000
+
+def read_excel_fast(path, **kwargs):
+    """Read an Excel file with the fastest available engine.
+
+    python-calamine (Rust-based) parses xlsx far faster than openpyxl's
+    default loader; when it is not installed, fall back to openpyxl in
+    read-only mode, which skips building the full in-memory cell tree.
+    """
+    try:
+        return pd.read_excel(path, engine='calamine', **kwargs)
+    except ImportError:
+        return pd.read_excel(path, engine='openpyxl',
+                             engine_kwargs={'read_only': True, 'data_only': True}, **kwargs)
+
+def load_xlsx_cached(path, **kwargs):
+    """Load an xlsx file, caching the parsed frame as Parquet next to it.
+
+    Parquet loads orders of magnitude faster than parsing XLSX, so
+    repeat runs skip the Excel parse entirely as long as the cache is at
+    least as new as the source workbook.
+    """
+    cache = path + '.parquet'
+    try:
+        if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+            return pd.read_parquet(cache)
+    except Exception:
+        pass
+
+    df = read_excel_fast(path, **kwargs)
+    try:
+        df.to_parquet(cache)
+    except Exception as e:
+        # Caching is best-effort, but a failed write means every run pays
+        # the full xlsx parse again - report it instead of hiding it
+        print(f"⚠️ Could not write Parquet cache {cache}: {e}")
+    return df
+
+def compute_column_widths(consolidated_data):
+    """Compute Excel column widths from the DataFrame in one vectorized pass.
+
+    Uses pandas' C-level string ops instead of iterating every cell in
+    Python, which is O(rows x cols) attribute accesses.
+    """
+    widths = {}
+    for col_name in consolidated_data.columns:
+        # .str.len() propagates missing values instead of choking on them
+        # (astype(str) keeps NaN as NaN on current pandas); an empty or
+        # all-NaN column reduces to NaN, hence the explicit guard
+        max_length = consolidated_data[col_name].astype(str).str.len().max()
+        max_length = int(max_length) if pd.notna(max_length) else 0
+        widths[col_name] = min(max(max_length, len(str(col_name))) + 2, 50)
+    return widths
+
+def write_consolidated_excel(filepath, consolidated_data):
+    """Write a consolidated DataFrame to Excel using xlsxwriter.
+
+    xlsxwriter is much faster than openpyxl for write-heavy workloads and
+    constant_memory mode keeps only one row in memory at a time, so large
+    Divisions no longer blow up RAM. Header styling and date formats are
+    applied via formats instead of per-cell loops after the write.
+    """
+    try:
+        import xlsxwriter
+    except ImportError:
+        # Fall back to openpyxl in write-only mode, which streams rows
+        # instead of building the whole cell tree in memory
+        write_consolidated_excel_openpyxl(filepath, consolidated_data)
+        return
+
+    # Serialize into memory first and flush with a single write, instead of
+    # letting the zip writer issue many small syscalls against the file
+    buffer = BytesIO()
+    workbook = xlsxwriter.Workbook(buffer, {'constant_memory': True})
+    try:
+        worksheet = workbook.add_worksheet('Consolidated Data')
+
+        header_format = workbook.add_format({
+            'bold': True, 'font_name': 'Arial', 'font_size': 10,
+            'bg_color': '#D3D3D3', 'align': 'center', 'valign': 'vcenter'
+        })
+        date_format = workbook.add_format({'num_format': 'dd/mm/yyyy'})
+
+        # Column widths and date formats are applied once per column, so no
+        # per-cell formatting happens in the row loop below
+        widths = compute_column_widths(consolidated_data)
+        for col_idx, col_name in enumerate(consolidated_data.columns):
+            if col_name in DATE_COLUMNS:
+                worksheet.set_column(col_idx, col_idx, widths[col_name], date_format)
+            else:
+                worksheet.set_column(col_idx, col_idx, widths[col_name])
+
+        worksheet.write_row(0, 0, consolidated_data.columns, header_format)
+
+        # constant_memory flushes each row on write, so streaming bounded
+        # chunks keeps RSS flat no matter how large the Division is
+        row_idx = 1
+        for start in range(0, len(consolidated_data), WRITE_CHUNK_ROWS):
+            chunk = consolidated_data.iloc[start:start + WRITE_CHUNK_ROWS]
+            for row in chunk.itertuples(index=False, name=None):
+                worksheet.write_row(row_idx, 0, [None if pd.isna(value) else value for value in row])
+                row_idx += 1
+    finally:
+        workbook.close()
+
+    with open(filepath, 'wb') as f:
+        f.write(buffer.getbuffer())
+
+def write_consolidated_excel_openpyxl(filepath, consolidated_data):
+    """Write a consolidated DataFrame with openpyxl in write-only mode.
+
+    A default openpyxl Workbook keeps every cell alive as a Python object
+    (roughly 50x the file size in RAM); write_only=True streams each row
+    straight to the XML serializer instead.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment
+    from openpyxl.utils import get_column_letter
+
+    header_font = Font(bold=True, name='Arial', size=10)
+    header_fill = PatternFill(start_color='D3D3D3', end_color='D3D3D3', fill_type='solid')
+    header_alignment = Alignment(horizontal='center', vertical='center')
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Consolidated Data')
+
+    # Widths must be precomputed from the DataFrame since a write-only
+    # sheet cannot iterate its cells after the fact
+    widths = compute_column_widths(consolidated_data)
+    date_col_idx = set()
+    for col_idx, col_name in enumerate(consolidated_data.columns):
+        ws.column_dimensions[get_column_letter(col_idx + 1)].width = widths[col_name]
+        if col_name in DATE_COLUMNS:
+            date_col_idx.add(col_idx)
+
+    header_cells = []
+    for col_name in consolidated_data.columns:
+        cell = WriteOnlyCell(ws, value=col_name)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    for start in range(0, len(consolidated_data), WRITE_CHUNK_ROWS):
+        chunk = consolidated_data.iloc[start:start + WRITE_CHUNK_ROWS]
+        for row in chunk.itertuples(index=False, name=None):
+            row_cells = []
+            for col_idx, value in enumerate(row):
+                if pd.isna(value):
+                    row_cells.append(None)
+                    continue
+                if col_idx in date_col_idx:
+                    cell = WriteOnlyCell(ws, value=value)
+                    cell.number_format = 'dd/mm/yyyy'
+                    row_cells.append(cell)
+                else:
+                    row_cells.append(value)
+            ws.append(row_cells)
+
+    buffer = BytesIO()
+    wb.save(buffer)
+    with open(filepath, 'wb') as f:
+        f.write(buffer.getbuffer())
+
+def process_division(div_code, affiliate, div_name, div_data, output_dir):
+    """Build and write the consolidated file for one TBM Division.
+
+    Top-level function so it can run as an independent worker process.
+    """
+    print(f"\n🔄 Processing TBM Division: {div_code} - {affiliate} - {div_name}")
+    print(f"   📊 Found {len(div_data)} records for this TBM Division")
+
+    # Select only the required columns for consolidated file
+    consolidated_columns = [
+        'Assigned Request Ids', 'Doctor: SAP Customer Code(New)', 'Doctor: Customer Code',
+        'Doctor: Account Name', 'Item Code', 'SKU', 'Requested Quantity', 'TBM Division',
+        'AFFILIATE', 'DIV_NAME', 'Date', 'Month', 'Invoice #', 'Invoice Date',
+        'Dispatch Date', 'Delivery Date', 'Docket Number', 'Transporter Name',
+        'Request Status', 'Final Status', 'Rto Reason', 'Input Sample Request: Created By', 'TBM HQ',
+        'ABM Name', 'ABM Terr Code', 'ZBM Name', 'ZBM Terr Code'
+    ]
+
+    # Select the columns without an eager copy; sort_values below already
+    # materializes the one new frame the writer needs
+    consolidated_data = div_data[consolidated_columns]
+
+    # Sort by ABM Terr Code and then by Assigned Request Ids
+    consolidated_data = consolidated_data.sort_values(
+        ['ABM Terr Code', 'Assigned Request Ids'], ignore_index=True)
+
+    # Create filename
+    safe_div_name = str(div_name).replace(' ', '_').replace('/', '_').replace('\\', '_')
+    filename = f"Division_Consolidated_{div_code}_{safe_div_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    filepath = os.path.join(output_dir, filename)
+
+    # Save to Excel
+    try:
+        write_consolidated_excel(filepath, consolidated_data)
+
+        print(f"   ✅ Created: {filename}")
+        print(f"   📊 Records in consolidated file: {len(consolidated_data)}")
+
+        if VERBOSE:
+            # Show sample of data
+            print(f"   📋 Sample data (first 3 rows):")
+            for idx, row in enumerate(consolidated_data.head(3).to_dict('records')):
+                print(f"      Row {idx+1}: {row['ABM Name']} - {row['Assigned Request Ids']} - {row['Request Status']} -> {row['Final Status']} - RTO: {row['Rto Reason']}")
+
+            # Debug: Check RTO Reason data in this Division's consolidated file
+            rto_reason_data = consolidated_data['Rto Reason'].value_counts(dropna=False)
+            print(f"   🔍 RTO Reason data in consolidated file:")
+            print(f"      Non-null RTO Reasons: {consolidated_data['Rto Reason'].notna().sum()}")
+            for reason, count in rto_reason_data.head(5).items():
+                print(f"      '{reason}': {count}")
+
+    except Exception as e:
+        print(f"   ❌ Error creating consolidated file for Division {div_code}: {e}")
+
 def create_division_consolidated_files():
     """Create consolidated files for each TBM Division with detailed data"""
     
     print("🚀 Starting Division Consolidated Files Generation...")
     
-    # Read Sample Master Tracker data
+    # Read Sample Master Tracker data; the logic.xlsx read is kicked off in
+    # parallel so its parse hides behind the much larger master tracker's
     print("📖 Reading ZBM Automation Email 2410252.xlsx...")
-    try:
-        df = pd.read_excel('ZBM Automation Email 2410252.xlsx')
-        print(f"✅ Successfully loaded {len(df)} records from ZBM Automation Email 2410252.xlsx")
-    except Exception as e:
-        print(f"❌ Error reading ZBM Automation Email 2410252.xlsx: {e}")
-        return
+    with ThreadPoolExecutor(max_workers=2) as reader_pool:
+        master_future = reader_pool.submit(load_xlsx_cached, 'ZBM Automation Email 2410252.xlsx',
+                                           dtype={c: 'string' for c in ID_COLUMNS})
+        logic_future = reader_pool.submit(read_excel_fast, 'logic.xlsx', sheet_name='Sheet2')
+
+        try:
+            df = master_future.result()
+            print(f"✅ Successfully loaded {len(df)} records from ZBM Automation Email 2410252.xlsx")
+        except Exception as e:
+            print(f"❌ Error reading ZBM Automation Email 2410252.xlsx: {e}")
+            logic_future.cancel()
+            return
     
     # Required columns for consolidated file
     required_columns = [
@@ -43,22 +288,23 @@ def create_division_consolidated_files():
         print(f"📋 Available columns: {list(df.columns)}")
         return
     
-    # Debug: Check RTO Reason column data
-    print(f"🔍 RTO Reason column analysis:")
-    rto_reason_counts = df['Rto Reason'].value_counts(dropna=False)
-    print(f"   Total records: {len(df)}")
-    print(f"   Non-null RTO Reasons: {df['Rto Reason'].notna().sum()}")
-    print(f"   RTO Reason value counts:")
-    for reason, count in rto_reason_counts.head(10).items():
-        print(f"      '{reason}': {count}")
-    
-    # Debug: Check TBM Division column data
-    print(f"🔍 TBM Division column analysis:")
-    tbm_div_counts = df['TBM Division'].value_counts(dropna=False)
-    print(f"   Non-null TBM Divisions: {df['TBM Division'].notna().sum()}")
-    print(f"   TBM Division value counts (top 10):")
-    for div, count in tbm_div_counts.head(10).items():
-        print(f"      '{div}': {count}")
+    if VERBOSE:
+        # Debug: Check RTO Reason column data
+        print(f"🔍 RTO Reason column analysis:")
+        rto_reason_counts = df['Rto Reason'].value_counts(dropna=False)
+        print(f"   Total records: {len(df)}")
+        print(f"   Non-null RTO Reasons: {df['Rto Reason'].notna().sum()}")
+        print(f"   RTO Reason value counts:")
+        for reason, count in rto_reason_counts.head(10).items():
+            print(f"      '{reason}': {count}")
+
+        # Debug: Check TBM Division column data
+        print(f"🔍 TBM Division column analysis:")
+        tbm_div_counts = df['TBM Division'].value_counts(dropna=False)
+        print(f"   Non-null TBM Divisions: {df['TBM Division'].notna().sum()}")
+        print(f"   TBM Division value counts (top 10):")
+        for div, count in tbm_div_counts.head(10).items():
+            print(f"      '{div}': {count}")
     
     # Remove rows where key fields are null or empty
     df = df.dropna(subset=['TBM Division', 'ABM Terr Code', 'ABM Name'])
@@ -68,15 +314,28 @@ def create_division_consolidated_files():
     # Standardize Division data to prevent duplicates
     df['TBM Division'] = df['TBM Division'].astype(str).str.strip()
     df['ABM Terr Code'] = df['ABM Terr Code'].astype(str).str.strip()
-    
+
+    # Convert low-cardinality key columns to category dtype so the later
+    # groupbys and merges hash integer codes instead of Python strings
+    for col in ['TBM Division', 'ABM Terr Code', 'ABM Name', 'ZBM Terr Code',
+                'Request Status', 'AFFILIATE', 'DIV_NAME']:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+
     print(f"📊 After cleaning: {len(df)} records remaining")
+
+    # Convert date columns once for the whole frame - the per-Division
+    # writers display them date-only via the column date format
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
     
     # Compute Final Answer per unique request id using rules from logic.xlsx
     print("🧠 Computing final status per unique Request Id using rules...")
     try:
-        xls_rules = pd.ExcelFile('logic.xlsx')
-        sheet2 = pd.read_excel(xls_rules, 'Sheet2')
+        sheet2 = logic_future.result()
 
+        @lru_cache(maxsize=None)
         def normalize(text):
             return str(text).strip().casefold()
 
@@ -86,20 +345,26 @@ def create_division_consolidated_files():
             statuses = tuple(sorted(set(statuses)))
             rules[statuses] = row['Final Answer']
 
-        # Group statuses by request id from master data
-        grouped = df.groupby('Assigned Request Ids')['Request Status'].apply(list).reset_index()
+        # Build the rules as a two-column frame so Final Answers can be
+        # resolved with a single C-level hash join instead of one Python
+        # dict lookup (plus tuple rebuild) per request id
+        rules_df = pd.DataFrame({'key': list(rules.keys()), 'Final Answer': list(rules.values())})
 
-        def get_final_answer(status_list):
-            key = tuple(sorted(set(normalize(s) for s in status_list)))
-            return rules.get(key, '❌ No matching rule')
+        # Normalize the status column once with pandas' C string ops so the
+        # per-group work below never re-normalizes the same strings
+        df['_norm_status'] = df['Request Status'].astype(str).str.strip().str.casefold()
 
-        grouped['Request Status'] = grouped['Request Status'].apply(lambda lst: sorted(set(lst), key=str))
-        grouped['Final Answer'] = grouped['Request Status'].apply(get_final_answer)
+        # Dedupe and sort (request id, status) pairs in pandas' C paths, so
+        # each group aggregates straight to its sorted-unique rule key
+        # without a Python-level set/sort per group
+        unique_pairs = df[['Assigned Request Ids', '_norm_status']].drop_duplicates()
+        grouped = (unique_pairs.sort_values('_norm_status')
+                   .groupby('Assigned Request Ids')['_norm_status']
+                   .agg(tuple).reset_index(name='key'))
 
-        def has_action_pending(status_list):
-            target = 'action pending / in process'
-            return any(normalize(s) == target for s in status_list)
-        grouped['Has D Pending'] = grouped['Request Status'].apply(has_action_pending)
+        grouped = grouped.merge(rules_df, on='key', how='left')
+        grouped['Final Answer'] = grouped['Final Answer'].fillna('❌ No matching rule')
+        grouped['Has D Pending'] = grouped['key'].map(lambda k: 'action pending / in process' in k)
 
         # Merge Final Answer back to main dataframe
         df = df.merge(grouped[['Assigned Request Ids', 'Final Answer', 'Has D Pending']], on='Assigned Request Ids', how='left')
@@ -114,36 +379,35 @@ def create_division_consolidated_files():
         # If logic file fails, use Request Status as Final Status
         df['Final Status'] = df['Request Status']
     
+    # Pre-slice the data once - every later per-Division lookup reads this
+    # dict instead of rescanning the full frame
+    div_groups_data = {code: group for code, group in df.groupby('TBM Division', sort=False)}
+
     # First, let's see how many unique TBM Divisions exist
-    unique_tbm_divisions = df['TBM Division'].unique()
-    print(f"📋 Found {len(unique_tbm_divisions)} unique TBM Divisions")
-    
+    print(f"📋 Found {len(div_groups_data)} unique TBM Divisions")
+
     # Now let's check if same TBM Division has different AFFILIATE/DIV_NAME
     div_check = df.groupby('TBM Division')[['AFFILIATE', 'DIV_NAME']].nunique()
     duplicates = div_check[(div_check['AFFILIATE'] > 1) | (div_check['DIV_NAME'] > 1)]
-    
+
     if len(duplicates) > 0:
         print(f"⚠️ WARNING: Found {len(duplicates)} TBM Divisions with multiple AFFILIATE/DIV_NAME:")
         for div_code in duplicates.index:
-            affiliates = df[df['TBM Division'] == div_code]['AFFILIATE'].unique()
-            div_names = df[df['TBM Division'] == div_code]['DIV_NAME'].unique()
+            affiliates = div_groups_data[div_code]['AFFILIATE'].unique()
+            div_names = div_groups_data[div_code]['DIV_NAME'].unique()
             print(f"   Division {div_code} has {len(affiliates)} different affiliates and {len(div_names)} different div names")
     
-    # Get unique TBM Divisions - Use ONLY TBM Division for uniqueness
-    div_groups = df.groupby('TBM Division').agg({
-        'AFFILIATE': 'first',  # Take the first affiliate
-        'DIV_NAME': 'first'    # Take the first div name
-    }).reset_index()
-    
-    divisions = div_groups.sort_values('TBM Division')
-    
-    print(f"\n📋 Creating {len(divisions)} consolidated files (one per unique TBM Division)")
-    
-    # Debug: Show Division list
-    print(f"🔍 Unique TBM Divisions to be processed:")
-    for _, div in divisions.iterrows():
-        div_count = len(df[df['TBM Division'] == div['TBM Division']])
-        print(f"   Division {div['TBM Division']} - {div['AFFILIATE']} - {div['DIV_NAME']} ({div_count} records)")
+    # The group dict already holds one slice per unique TBM Division -
+    # iterate it directly instead of building a separate divisions frame
+    division_items = sorted(div_groups_data.items())
+
+    print(f"\n📋 Creating {len(division_items)} consolidated files (one per unique TBM Division)")
+
+    if VERBOSE:
+        # Debug: Show Division list
+        print(f"🔍 Unique TBM Divisions to be processed:")
+        for div_code, div_data in division_items:
+            print(f"   Division {div_code} - {div_data['AFFILIATE'].iat[0]} - {div_data['DIV_NAME'].iat[0]} ({len(div_data)} records)")
     
     # Create output directory
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -151,120 +415,24 @@ def create_division_consolidated_files():
     os.makedirs(output_dir, exist_ok=True)
     print(f"📁 Created output directory: {output_dir}")
     
-    # Process each TBM Division
-    for _, div_row in divisions.iterrows():
-        div_code = div_row['TBM Division']
-        affiliate = div_row['AFFILIATE']
-        div_name = div_row['DIV_NAME']
-        
-        print(f"\n🔄 Processing TBM Division: {div_code} - {affiliate} - {div_name}")
-        
-        # Filter data for this TBM Division
-        div_data = df[df['TBM Division'] == div_code]
-        
-        if len(div_data) == 0:
-            print(f"⚠️ No data found for TBM Division: {div_code}")
-            continue
-        
-        print(f"   📊 Found {len(div_data)} records for this TBM Division")
-        
-        # Select only the required columns for consolidated file
-        consolidated_columns = [
-            'Assigned Request Ids', 'Doctor: SAP Customer Code(New)', 'Doctor: Customer Code', 
-            'Doctor: Account Name', 'Item Code', 'SKU', 'Requested Quantity', 'TBM Division', 
-            'AFFILIATE', 'DIV_NAME', 'Date', 'Month', 'Invoice #', 'Invoice Date', 
-            'Dispatch Date', 'Delivery Date', 'Docket Number', 'Transporter Name', 
-            'Request Status', 'Final Status', 'Rto Reason', 'Input Sample Request: Created By', 'TBM HQ', 
-            'ABM Name', 'ABM Terr Code', 'ZBM Name', 'ZBM Terr Code'
-        ]
-        
-        # Create consolidated data for this TBM Division
-        consolidated_data = div_data[consolidated_columns].copy()
-        
-        # Format date columns to show only date without time
-        date_columns = ['Date', 'Invoice Date', 'Dispatch Date', 'Delivery Date']
-        for col in date_columns:
-            if col in consolidated_data.columns:
-                # Convert to datetime and format as date only
-                consolidated_data[col] = pd.to_datetime(consolidated_data[col], errors='coerce').dt.date
-                print(f"   📅 Formatted {col} column to date-only format")
-        
-        # Sort by ABM Terr Code and then by Assigned Request Ids
-        consolidated_data = consolidated_data.sort_values(['ABM Terr Code', 'Assigned Request Ids'])
-        
-        # Create filename
-        safe_div_name = str(div_name).replace(' ', '_').replace('/', '_').replace('\\', '_')
-        filename = f"Division_Consolidated_{div_code}_{safe_div_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        filepath = os.path.join(output_dir, filename)
-        
-        # Save to Excel
-        try:
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                consolidated_data.to_excel(writer, sheet_name='Consolidated Data', index=False)
-                
-                # Get the workbook and worksheet
-                workbook = writer.book
-                worksheet = writer.sheets['Consolidated Data']
-                
-                # Auto-adjust column widths
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-                
-                # Add header formatting
-                from openpyxl.styles import Font, PatternFill, Alignment
-                
-                header_font = Font(bold=True, name='Arial', size=10)
-                header_fill = PatternFill(start_color='D3D3D3', end_color='D3D3D3', fill_type='solid')
-                header_alignment = Alignment(horizontal='center', vertical='center')
-                
-                for cell in worksheet[1]:
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.alignment = header_alignment
-                
-                # Format date columns in Excel
-                date_columns_excel = ['Date', 'Invoice Date', 'Dispatch Date', 'Delivery Date']
-                for col_name in date_columns_excel:
-                    if col_name in consolidated_data.columns:
-                        # Find the column index
-                        col_idx = consolidated_data.columns.get_loc(col_name) + 1  # +1 because Excel is 1-indexed
-                        col_letter = worksheet.cell(row=1, column=col_idx).column_letter
-                        
-                        # Apply date format to all data cells in this column
-                        for row in range(2, worksheet.max_row + 1):  # Start from row 2 (skip header)
-                            cell = worksheet.cell(row=row, column=col_idx)
-                            if cell.value is not None:
-                                cell.number_format = 'dd/mm/yyyy'  # Date format without time
-            
-            print(f"   ✅ Created: {filename}")
-            print(f"   📊 Records in consolidated file: {len(consolidated_data)}")
-            
-            # Show sample of data
-            print(f"   📋 Sample data (first 3 rows):")
-            for idx, (_, row) in enumerate(consolidated_data.head(3).iterrows()):
-                print(f"      Row {idx+1}: {row['ABM Name']} - {row['Assigned Request Ids']} - {row['Request Status']} -> {row['Final Status']} - RTO: {row['Rto Reason']}")
-            
-            # Debug: Check RTO Reason data in this Division's consolidated file
-            rto_reason_data = consolidated_data['Rto Reason'].value_counts(dropna=False)
-            print(f"   🔍 RTO Reason data in consolidated file:")
-            print(f"      Non-null RTO Reasons: {consolidated_data['Rto Reason'].notna().sum()}")
-            for reason, count in rto_reason_data.head(5).items():
-                print(f"      '{reason}': {count}")
-            
-        except Exception as e:
-            print(f"   ❌ Error creating consolidated file for Division {div_code}: {e}")
-            continue
+    # Process TBM Divisions in parallel - each Division produces an
+    # independent .xlsx, so the writes can use all available cores
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = []
+        for div_code, div_data in division_items:
+            if len(div_data) == 0:
+                print(f"⚠️ No data found for TBM Division: {div_code}")
+                continue
+
+            futures.append(executor.submit(
+                process_division, div_code,
+                div_data['AFFILIATE'].iat[0], div_data['DIV_NAME'].iat[0],
+                div_data, output_dir))
+
+        for future in futures:
+            future.result()
     
-    print(f"\n🎉 Successfully created {len(divisions)} consolidated files in directory: {output_dir}")
+    print(f"\n🎉 Successfully created {len(division_items)} consolidated files in directory: {output_dir}")
     print(f"📁 Each file contains detailed data for that specific TBM Division only")
     print(f"📧 These files are ready to be attached to Division emails")
 
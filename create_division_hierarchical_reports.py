@@ -1,12 +1,109 @@
 from openpyxl import Workbook, load_workbook
+from openpyxl.cell.cell import MergedCell
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from copy import copy as copy_style
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+import copy
 import pandas as pd
 import os
+import re
 from datetime import datetime
 
-def create_division_excel_report(div_code, affiliate, div_name, summary_df, output_dir):
+# Header text -> canonical summary column, compiled once. Each pattern
+# mirrors one arm of the old if/elif chain ((?=...) = contains,
+# (?!...) = does not contain); order matters, first match wins.
+_HEADER_PATTERNS = [
+    (re.compile(r'(?s)^(?=.*Affiliate)'), 'Affiliate'),
+    (re.compile(r'(?s)^(?=.*Division)(?!.*Name)'), 'Division'),
+    (re.compile(r'(?s)^(?=.*Division Name)'), 'Division Name'),
+    (re.compile(r'(?s)^(?=.*TBMs)'), '# Unique TBMs'),
+    (re.compile(r'(?s)^(?=.*HCPs)'), '# Unique HCPs'),
+    (re.compile(r'(?s)^(?=.*Requests [Rr]aised)'), '# Requests Raised\n(A+B+C)'),
+    (re.compile(r'(?s)^(?=.*Out of [Ss]tock)'), 'Request Cancelled / Out of Stock (A)'),
+    (re.compile(r'(?s)^(?=.*Action pending)(?=.*HO)'), 'Action pending / In Process At HO (B)'),
+    (re.compile(r'(?s)^(?=.*Sent to HUB)'), "Sent to HUB ('C)\n(D+E+F)"),
+    (re.compile(r'(?s)^(?=.*Pending for Invoicing)'), 'Pending for Invoicing (D)'),
+    (re.compile(r'(?s)^(?=.*Pending for Dispatch)'), 'Pending for Dispatch (E)'),
+    (re.compile(r'(?s)^(?=.*Requests Dispatched)(?!.*In Transit)'), '# Requests Dispatched (F)\n(G+H+I)'),
+    (re.compile(r'(?s)^(?=.*Delivered)(?=.*\()'), 'Delivered (G)'),
+    (re.compile(r'(?s)^(?=.*Dispatched (?:&|&amp;) In Transit)'), 'Dispatched & In Transit (H)'),
+    (re.compile(r'(?s)^(?=.*RTO)(?=.*\()(?!.*Hold)'), 'RTO (I)'),
+    (re.compile(r'(?s)^(?=.*Incomplete Address)'), 'Incomplete Address'),
+    (re.compile(r'(?s)^(?=.*Non Contactable)'), 'Doctor Non Contactable'),
+    (re.compile(r'(?s)^(?=.*[Rr]efused to [Aa]ccept)'), 'Doctor Refused to Accept'),
+    (re.compile(r'(?s)^(?=.*Hold Delivery)'), 'Hold Delivery'),
+]
+
+# Shared style objects for the Total row - openpyxl style objects are
+# immutable, so one instance can serve every cell of every report
+_TOTAL_FONT = Font(bold=True, name='Arial', size=10)
+_CENTER_ALIGN = Alignment(horizontal='center', vertical='center')
+
+# Detected template layout (header row, Total row, column mapping), keyed
+# by (path, mtime) so an edited template invalidates the entry
+_LAYOUT_CACHE = {}
+
+# Filename-unsafe characters replaced in one translate() pass
+_SAFE_NAME_TRANS = str.maketrans({' ': '_', '/': '_', '\\': '_'})
+
+@lru_cache(maxsize=1)
+def _template_bytes(template_file):
+    """Read the template file once per process and reuse the raw bytes."""
+    with open(template_file, 'rb') as f:
+        return f.read()
+
+def _build_merged_values(ws):
+    """Expand the merged ranges into a (row, col) -> top-left value dict."""
+    merged_values = {}
+    # snapshot the ranges once - the merged_cells.ranges property rebuilds
+    # its view on every access
+    merged_ranges = list(ws.merged_cells.ranges)
+    for merged_range in merged_ranges:
+        top_left_value = ws.cell(row=merged_range.min_row, column=merged_range.min_col).value
+        for m_row in range(merged_range.min_row, merged_range.max_row + 1):
+            for m_col in range(merged_range.min_col, merged_range.max_col + 1):
+                merged_values[(m_row, m_col)] = top_left_value
+    return merged_values
+
+def _copy_row_style(ws, src_row_idx, dst_row_idx):
+    """Copy formatting from source row to destination row"""
+    # The style accessors hand back a read-only StyleProxy that the
+    # setters reject when the workbook is saved, so each attribute is
+    # unwrapped with copy.copy before assignment
+    for src, dst in zip(ws[src_row_idx], ws[dst_row_idx]):
+        if src.font:
+            dst.font = copy.copy(src.font)
+        if src.alignment:
+            dst.alignment = copy.copy(src.alignment)
+        if src.border:
+            dst.border = copy.copy(src.border)
+        if src.fill:
+            dst.fill = copy.copy(src.fill)
+        dst.number_format = src.number_format
+
+def create_division_excel_reports_parallel(jobs, output_dir):
+    """Write many division reports concurrently.
+
+    jobs is an iterable of (div_code, affiliate, div_name, summary_df)
+    tuples. The reports share nothing but the template file, so each
+    worker process fills and saves its workbooks independently.
+    """
+    date_tag = datetime.now().strftime('%Y%m%d')
+    with ProcessPoolExecutor() as executor:
+        futures = [executor.submit(create_division_excel_report, div_code, affiliate,
+                                   div_name, summary_df, output_dir, date_tag)
+                   for div_code, affiliate, div_name, summary_df in jobs]
+        for future in futures:
+            future.result()
+
+def create_division_excel_report(div_code, affiliate, div_name, summary_df, output_dir, date_tag=None):
     """Create Excel report for a specific Division with perfect formatting based on Excel template"""
+
+    # Batch callers pass one shared date tag so filenames stay consistent
+    # across a run; standalone calls fall back to today's date
+    if date_tag is None:
+        date_tag = datetime.now().strftime('%Y%m%d')
     
     try:
         # Load Excel template file (not CSV)
@@ -16,155 +113,129 @@ def create_division_excel_report(div_code, affiliate, div_name, summary_df, outp
             print(f"   ❌ Template file not found: {template_file}")
             return
         
-        # Load the Excel template to preserve formatting
-        wb = load_workbook(template_file)
+        # Load the Excel template to preserve formatting - the bytes are read
+        # from disk once and reparsed from memory for every division
+        wb = load_workbook(BytesIO(_template_bytes(template_file)))
         ws = wb.active
 
-        def get_cell_value_handling_merged(row, col):
-            """Get cell value even if it's part of a merged cell"""
-            cell = ws.cell(row=row, column=col)
-            
-            # Check if this cell is part of a merged range
-            for merged_range in ws.merged_cells.ranges:
-                if cell.coordinate in merged_range:
-                    # Get the top-left cell of the merged range
-                    top_left_cell = ws.cell(row=merged_range.min_row, column=merged_range.min_col)
-                    return top_left_cell.value
-            
-            return cell.value
-        
-        # Search for header row containing "Affiliate"
-        header_row = None
-        for row_idx in range(1, 15):
-            for col_idx in range(1, min(30, ws.max_column + 1)):
-                cell_value = get_cell_value_handling_merged(row_idx, col_idx)
-                if cell_value and 'Affiliate' in str(cell_value):
+        # Bind the template dimensions once - the max_column/max_row
+        # properties recompute on every access
+        max_col = ws.max_column
+        max_row = ws.max_row
+
+        # The header/Total/column scans depend only on the template, so
+        # their result is detected once per process and keyed on the file
+        # mtime in case the template is edited between runs
+        layout_key = (template_file, os.path.getmtime(template_file))
+        layout = _LAYOUT_CACHE.get(layout_key)
+        if layout is None:
+            # Expand the merged ranges once into a coordinate lookup;
+            # probing a cell no longer walks the whole range list
+            merged_values = _build_merged_values(ws)
+
+            def get_cell_value_handling_merged(row, col):
+                """Get cell value even if it's part of a merged cell"""
+                if (row, col) in merged_values:
+                    return merged_values[(row, col)]
+                return ws.cell(row=row, column=col).value
+
+            # Search for header row containing "Affiliate" - stream the
+            # candidate region in one iter_rows pass instead of probing
+            # ws.cell() per coordinate (merged headers carry their text in
+            # the top-left cell)
+            header_row = None
+            for row_idx, row_values in enumerate(
+                    ws.iter_rows(min_row=1, max_row=14, max_col=min(30, max_col),
+                                 values_only=True), start=1):
+                if any(value and 'Affiliate' in str(value) for value in row_values):
                     header_row = row_idx
                     break
-            if header_row:
-                break
-        
-        if header_row is None:
-            header_row = 3  # Default based on CSV template structure (row 3)
-        
-        # Find "Total" row
-        total_row = None
-        for row_idx in range(header_row + 1, min(header_row + 20, ws.max_row + 1)):
-            cell_value = get_cell_value_handling_merged(row_idx, 1)
-            if cell_value and 'Total' in str(cell_value):
-                total_row = row_idx
-                break
-        
-        if total_row is None:
-            total_row = header_row + 6  # Default position
-        
+
+            if header_row is None:
+                header_row = 3  # Default based on CSV template structure (row 3)
+
+            # Find "Total" row
+            total_row = None
+            for row_idx in range(header_row + 1, min(header_row + 20, max_row + 1)):
+                cell_value = get_cell_value_handling_merged(row_idx, 1)
+                if cell_value and 'Total' in str(cell_value):
+                    total_row = row_idx
+                    break
+
+            if total_row is None:
+                total_row = header_row + 6  # Default position
+
+            # Read actual column positions from template header row; the
+            # scan stops as soon as every known header has been mapped
+            column_mapping = {}
+            remaining = {key for _, key in _HEADER_PATTERNS}
+            for col_idx in range(1, min(30, max_col + 1)):
+                if not remaining:
+                    break
+                header_val = get_cell_value_handling_merged(header_row, col_idx)
+                if header_val:
+                    header_str = str(header_val).strip()
+
+                    # Map columns based on template via the precompiled patterns
+                    for pattern, key in _HEADER_PATTERNS:
+                        if pattern.search(header_str):
+                            column_mapping[key] = col_idx
+                            remaining.discard(key)
+                            break
+
+            layout = (header_row, total_row, column_mapping)
+            _LAYOUT_CACHE[layout_key] = layout
+
+        header_row, total_row, column_mapping = layout
         data_start_row = header_row + 1
-        
-        # Read actual column positions from template header row
-        column_mapping = {}
-        for col_idx in range(1, min(30, ws.max_column + 1)):
-            header_val = get_cell_value_handling_merged(header_row, col_idx)
-            if header_val:
-                header_str = str(header_val).strip()
-                
-                # Map columns based on template
-                if 'Affiliate' in header_str:
-                    column_mapping['Affiliate'] = col_idx
-                elif 'Division' in header_str and 'Name' not in header_str:
-                    column_mapping['Division'] = col_idx
-                elif 'Division Name' in header_str:
-                    column_mapping['Division Name'] = col_idx
-                elif 'TBMs' in header_str or '# Unique TBMs' in header_str:
-                    column_mapping['# Unique TBMs'] = col_idx
-                elif 'HCPs' in header_str or '# Unique HCPs' in header_str:
-                    column_mapping['# Unique HCPs'] = col_idx
-                elif 'Requests Raised' in header_str or 'Requests raised' in header_str:
-                    column_mapping['# Requests Raised\n(A+B+C)'] = col_idx
-                elif 'Out of Stock' in header_str or 'Out of stock' in header_str:
-                    column_mapping['Request Cancelled / Out of Stock (A)'] = col_idx
-                elif 'Action pending' in header_str and 'HO' in header_str:
-                    column_mapping['Action pending / In Process At HO (B)'] = col_idx
-                elif 'Sent to HUB' in header_str:
-                    column_mapping["Sent to HUB ('C)\n(D+E+F)"] = col_idx
-                elif 'Pending for Invoicing' in header_str:
-                    column_mapping['Pending for Invoicing (D)'] = col_idx
-                elif 'Pending for Dispatch' in header_str:
-                    column_mapping['Pending for Dispatch (E)'] = col_idx
-                elif 'Requests Dispatched' in header_str and 'In Transit' not in header_str:
-                    column_mapping['# Requests Dispatched (F)\n(G+H+I)'] = col_idx
-                elif 'Delivered' in header_str and '(' in header_str:
-                    column_mapping['Delivered (G)'] = col_idx
-                elif 'Dispatched & In Transit' in header_str or 'Dispatched &amp; In Transit' in header_str:
-                    column_mapping['Dispatched & In Transit (H)'] = col_idx
-                elif 'RTO' in header_str and '(' in header_str and 'Hold' not in header_str:
-                    column_mapping['RTO (I)'] = col_idx
-                elif 'Incomplete Address' in header_str:
-                    column_mapping['Incomplete Address'] = col_idx
-                elif 'Doctor Non Contactable' in header_str or 'Non Contactable' in header_str:
-                    column_mapping['Doctor Non Contactable'] = col_idx
-                elif 'Refused to Accept' in header_str or 'refused to accept' in header_str:
-                    column_mapping['Doctor Refused to Accept'] = col_idx
-                elif 'Hold Delivery' in header_str:
-                    column_mapping['Hold Delivery'] = col_idx
-
-        # Clear existing data rows (between header and total)
-        for r in range(data_start_row, total_row):
-            for c in range(1, ws.max_column + 1):
-                try:
-                    cell = ws.cell(row=r, column=c)
-                    cell.value = None
-                except:
-                    pass
-
-        def copy_row_style(src_row_idx, dst_row_idx):
-            """Copy formatting from source row to destination row"""
-            for c in range(1, ws.max_column + 1):
-                try:
-                    src = ws.cell(row=src_row_idx, column=c)
-                    dst = ws.cell(row=dst_row_idx, column=c)
-                    
-                    if src.font:
-                        dst.font = copy_style(src.font)
-                    if src.alignment:
-                        dst.alignment = copy_style(src.alignment)
-                    if src.border:
-                        dst.border = copy_style(src.border)
-                    if src.fill:
-                        dst.fill = copy_style(src.fill)
-                    dst.number_format = src.number_format
-                except:
-                    pass
+
+        # Clear existing data rows (between header and total) in one
+        # streamed pass; merged children are read-only and stay untouched
+        if total_row > data_start_row:
+            for row_cells in ws.iter_rows(min_row=data_start_row, max_row=total_row - 1,
+                                          max_col=max_col):
+                for cell in row_cells:
+                    if not isinstance(cell, MergedCell):
+                        cell.value = None
 
         # Write data to Total row with values
-        copy_row_style(total_row, total_row)
+        _copy_row_style(ws, total_row, total_row)
         
         # Set "Total" text in first column
         ws.cell(row=total_row, column=1, value="Total")
         
+        # Pull the single summary row into a plain dict once instead of a
+        # pandas label lookup per column
+        row_values = summary_df.iloc[0].to_dict()
+
         for col_name, col_idx in column_mapping.items():
-            if col_name in summary_df.columns:
-                value = summary_df.iloc[0][col_name]
-                
-                try:
-                    cell = ws.cell(row=total_row, column=col_idx)
-                    cell.value = value
-                    
-                    if isinstance(value, (int, float)) and not pd.isna(value):
-                        cell.number_format = '0'
-                        cell.font = Font(bold=True, name='Arial', size=10)
-                        cell.alignment = Alignment(horizontal='center', vertical='center')
-                    else:
-                        cell.font = Font(bold=True, name='Arial', size=10)
-                        cell.alignment = Alignment(horizontal='center', vertical='center')
-                except Exception as e:
-                    print(f"   Warning: Could not set value for column {col_name}: {e}")
+            if col_name in row_values:
+                value = row_values[col_name]
+
+                # col_idx comes from the bounded header scan, so the write
+                # cannot go out of range; the function-level handler still
+                # reports anything unexpected
+                cell = ws.cell(row=total_row, column=col_idx)
+                cell.value = value
+
+                if isinstance(value, (int, float)) and not pd.isna(value):
+                    cell.number_format = '0'
+                cell.font = _TOTAL_FONT
+                cell.alignment = _CENTER_ALIGN
 
         # Save file
-        safe_div_name = str(div_name).replace(' ', '_').replace('/', '_').replace('\\', '_')
-        filename = f"Division_Summary_{div_code}_{safe_div_name}_{datetime.now().strftime('%Y%m%d')}.xlsx"
+        safe_div_name = str(div_name).translate(_SAFE_NAME_TRANS)
+        filename = f"Division_Summary_{div_code}_{safe_div_name}_{date_tag}.xlsx"
         filepath = os.path.join(output_dir, filename)
         
-        wb.save(filepath)
+        # Stage the workbook in memory so the OS gets one contiguous write
+        # per report instead of openpyxl's many small writes into the zip
+        buffer = BytesIO()
+        wb.save(buffer)
+        # buffering=0 skips Python's own write buffer - the bytes are
+        # already contiguous, so double-buffering just costs a memcpy
+        with open(filepath, 'wb', buffering=0) as f:
+            f.write(buffer.getbuffer())
         print(f"   ✅ Created: {filename}")
         
     except Exception as e:
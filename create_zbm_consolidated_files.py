@@ -6,12 +6,151 @@ Creates detailed consolidated files for each ZBM with specific columns from Samp
 
 import pandas as pd
 import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import warnings
 
 # Suppress pandas warnings
 warnings.filterwarnings('ignore', category=FutureWarning, module='pandas')
 
+# Everything the consolidated files need from the master tracker; the
+# reader materialises only these columns
+MASTER_COLUMNS = [
+    'Assigned Request Ids', 'Doctor: SAP Customer Code(New)', 'Doctor: Customer Code',
+    'Doctor: Account Name', 'Item Code', 'SKU', 'Requested Quantity', 'TBM Division',
+    'AFFILIATE', 'DIV_NAME', 'Date', 'Month', 'Invoice #', 'Invoice Date',
+    'Dispatch Date', 'Delivery Date', 'Docket Number', 'Transporter Name',
+    'Request Status', 'Rto Reason', 'Input Sample Request: Created By', 'TBM HQ', 'ABM Name', 'ABM Terr Code',
+    'ZBM Terr Code', 'ZBM Name', 'ZBM EMAIL_ID'
+]
+
+# Identifier-ish columns read as strings up front so nothing downstream
+# needs an astype(str) guess, and date columns parsed exactly once
+ID_COLUMNS = ['Assigned Request Ids', 'Doctor: SAP Customer Code(New)', 'Doctor: Customer Code',
+              'Item Code', 'Invoice #', 'Docket Number', 'ZBM Terr Code', 'ABM Terr Code']
+DATE_COLUMNS = ['Date', 'Invoice Date', 'Dispatch Date', 'Delivery Date']
+
+def load_master(path):
+    """Read the master tracker, preferring a Parquet sidecar cache.
+
+    A columnar copy is kept next to the workbook and reused as long as it
+    is newer than the xlsx, skipping the whole XML parse on repeat runs.
+    The cache is best effort - without a parquet engine installed the
+    workbook is simply read directly every time. The filename carries a
+    '.zbm' marker because this frame is shaped for the ZBM flow (column
+    subset, string ids, parsed dates); the division loader keeps its own
+    raw-frame cache at path + '.parquet' against the same workbook.
+    """
+    cache_path = path + '.zbm.parquet'
+    try:
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) > os.path.getmtime(path):
+            return pd.read_parquet(cache_path, columns=MASTER_COLUMNS)
+    except Exception:
+        pass
+
+    df = pd.read_excel(path, usecols=MASTER_COLUMNS,
+                       dtype={c: 'string' for c in ID_COLUMNS})
+    # Parse the dates once here; the per-ZBM loop used to redo this for
+    # every slice. cache=True parses each distinct value a single time -
+    # these columns are mostly repeats of a few hundred dates. No fixed
+    # format is pinned because Excel hands over true datetime cells;
+    # only stray text cells go through the parser at all
+    for col in DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col], errors='coerce', cache=True)
+    try:
+        df.to_parquet(cache_path)
+    except Exception:
+        pass
+    return df
+
+def _load_logic_rules(path='logic.xlsx'):
+    """Load the Final Answer rules, compiled once and cached in a pickle.
+
+    The rules sheet is tiny but invariant between edits, so the compiled
+    dict is dumped next to the workbook and reused while it is newer than
+    the xlsx - repeat runs skip the Excel open entirely. Best effort,
+    same as the master tracker cache.
+    """
+    cache_path = path + '.pickle'
+    try:
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) > os.path.getmtime(path):
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+    except Exception:
+        pass
+
+    sheet2 = pd.read_excel(path, sheet_name='Sheet2')
+
+    def normalize(text):
+        return str(text).strip().casefold()
+
+    # Rules keyed by frozenset of normalized statuses - an immutable
+    # hashable key, so matching a request is one hash probe
+    rules = {}
+    for _, row in sheet2.iterrows():
+        statuses = frozenset(normalize(s) for s in row.drop('Final Answer').dropna())
+        rules[statuses] = row['Final Answer']
+
+    try:
+        with open(cache_path, 'wb') as f:
+            pickle.dump(rules, f)
+    except Exception:
+        pass
+    return rules
+
+def write_zbm_consolidated_file(zbm_code, zbm_name, consolidated_data, output_dir, date_tag):
+    """Write one ZBM's consolidated workbook - runs in a worker process.
+
+    Every file is built from its own slice with no shared state, so the
+    batch caller fans these out over a process pool; date_tag keeps all
+    filenames of one run on the same timestamp.
+    """
+    safe_zbm_name = str(zbm_name).replace(' ', '_').replace('/', '_').replace('\\', '_')
+    filename = f"ZBM_Consolidated_{zbm_code}_{safe_zbm_name}_{date_tag}.xlsx"
+    filepath = os.path.join(output_dir, filename)
+
+    # Save to Excel - xlsxwriter in constant_memory mode streams rows
+    # straight to disk instead of holding a full cell tree in memory.
+    # That mode flushes a row as soon as a later one is touched, so the
+    # rows must be written manually in strict row order (to_excel fills
+    # column by column, which silently loses every column after the
+    # first); widths, date formats and the header all go in before the
+    # data, same as the Division writer
+    with pd.ExcelWriter(filepath, engine='xlsxwriter',
+                        engine_kwargs={'options': {'constant_memory': True}}) as writer:
+        workbook = writer.book
+        worksheet = workbook.add_worksheet('Consolidated Data')
+
+        header_format = workbook.add_format({
+            'bold': True, 'font_name': 'Arial', 'font_size': 10,
+            'bg_color': '#D3D3D3', 'align': 'center', 'valign': 'vcenter',
+        })
+        date_format = workbook.add_format({'num_format': 'dd/mm/yyyy'})
+
+        # Auto-adjust column widths from one vectorized length pass per
+        # column; the date columns carry their display format here, which
+        # the unformatted cells below inherit
+        for i, col_name in enumerate(consolidated_data.columns):
+            # the length reduction comes back NaN for an all-NaN column
+            # (Rto Reason is often empty for a whole ZBM)
+            max_cell_len = consolidated_data[col_name].astype(str).str.len().max()
+            max_length = max(int(max_cell_len) if pd.notna(max_cell_len) else 0,
+                             len(str(col_name)))
+            width = min(max_length + 2, 50)
+            if col_name in DATE_COLUMNS:
+                worksheet.set_column(i, i, width, date_format)
+            else:
+                worksheet.set_column(i, i, width)
+
+        worksheet.write_row(0, 0, [str(c) for c in consolidated_data.columns], header_format)
+
+        for row_idx, row in enumerate(consolidated_data.itertuples(index=False, name=None), start=1):
+            worksheet.write_row(row_idx, 0, [None if pd.isna(value) else value for value in row])
+
+    print(f"   ✅ Created: {filename}")
+    return filename
+
 def create_zbm_consolidated_files():
     """Create consolidated files for each ZBM with detailed data"""
     
@@ -20,7 +159,7 @@ def create_zbm_consolidated_files():
     # Read Sample Master Tracker data
     print("📖 Reading Sample Master Tracker.xlsx...")
     try:
-        df = pd.read_excel('ZBM Automation Email 2410252.xlsx')
+        df = load_master('ZBM Automation Email 2410252.xlsx')
         print(f"✅ Successfully loaded {len(df)} records from Sample Master Tracker.xlsx")
     except Exception as e:
         print(f"❌ Error reading Sample Master Tracker.xlsx: {e}")
@@ -68,6 +207,12 @@ def create_zbm_consolidated_files():
     # Standardize ZBM data to prevent duplicates
     df['ZBM Terr Code'] = df['ZBM Terr Code'].astype(str).str.strip()
     df['ZBM Name'] = df['ZBM Name'].astype(str).str.strip()
+
+    # These columns hold a handful of distinct values each; as categoricals
+    # the groupbys and comparisons below work on int codes, not strings
+    for col in ['Request Status', 'ZBM Terr Code', 'ZBM Name',
+                'ABM Terr Code', 'ABM Name', 'Rto Reason']:
+        df[col] = df[col].astype('category')
     
     # Filter for ZBM codes that start with "ZN"
     # df = df[df['ZBM Terr Code'].astype(str).str.startswith('ZN')]
@@ -76,37 +221,28 @@ def create_zbm_consolidated_files():
     # Compute Final Answer per unique request id using rules from logic.xlsx
     print("🧠 Computing final status per unique Request Id using rules...")
     try:
-        xls_rules = pd.ExcelFile('logic.xlsx')
-        sheet2 = pd.read_excel(xls_rules, 'Sheet2')
+        rules = _load_logic_rules()
 
-        def normalize(text):
-            return str(text).strip().casefold()
+        # Normalize the status column once with the vectorized str accessor
+        # - the per-value normalize lives in _load_logic_rules and only
+        # ever touches the small rules sheet
+        df['_ns'] = df['Request Status'].astype('string').str.strip().str.casefold()
 
-        rules = {}
-        for _, row in sheet2.iterrows():
-            statuses = [normalize(s) for s in row.drop('Final Answer').dropna().tolist()]
-            statuses = tuple(sorted(set(statuses)))
-            rules[statuses] = row['Final Answer']
-
-        # Group statuses by request id from master data
-        grouped = df.groupby('Assigned Request Ids')['Request Status'].apply(list).reset_index()
-
-        def get_final_answer(status_list):
-            key = tuple(sorted(set(normalize(s) for s in status_list)))
-            return rules.get(key, '❌ No matching rule')
-
-        grouped['Request Status'] = grouped['Request Status'].apply(lambda lst: sorted(set(lst), key=str))
-        grouped['Final Answer'] = grouped['Request Status'].apply(get_final_answer)
-
-        def has_action_pending(status_list):
-            target = 'action pending / in process'
-            return any(normalize(s) == target for s in status_list)
-        grouped['Has D Pending'] = grouped['Request Status'].apply(has_action_pending)
+        # Collapse each request id to its status frozenset once, then both
+        # the rule match and the D-pending check are plain map lookups
+        # instead of sort/tuple apply passes per request
+        status_sets = df.groupby('Assigned Request Ids')['_ns'].agg(frozenset)
+        lookup = pd.DataFrame({
+            'Final Answer': status_sets.map(rules).fillna('❌ No matching rule'),
+            'Has D Pending': status_sets.map(lambda s: 'action pending / in process' in s),
+        })
 
         # Merge Final Answer back to main dataframe
-        df = df.merge(grouped[['Assigned Request Ids', 'Final Answer', 'Has D Pending']], on='Assigned Request Ids', how='left')
+        df = df.merge(lookup, left_on='Assigned Request Ids', right_index=True, how='left')
         
-        # Use Final Answer as Final Status
+        # Use Final Answer as Final Status - also low cardinality, so it
+        # joins the category columns
+        df['Final Answer'] = df['Final Answer'].astype('category')
         df['Final Status'] = df['Final Answer']
         
         print(f"✅ Successfully computed final status for all records")
@@ -121,7 +257,7 @@ def create_zbm_consolidated_files():
     print(f"📋 Found {len(unique_zbm_codes)} unique ZBM Terr Codes")
     
     # Now let's check if same ZBM Terr Code has different ZBM Names
-    zbm_code_name_check = df.groupby('ZBM Terr Code')['ZBM Name'].nunique()
+    zbm_code_name_check = df.groupby('ZBM Terr Code', observed=True)['ZBM Name'].nunique()
     duplicates = zbm_code_name_check[zbm_code_name_check > 1]
     
     if len(duplicates) > 0:
@@ -133,21 +269,20 @@ def create_zbm_consolidated_files():
                 count = len(df[(df['ZBM Terr Code'] == zbm_code) & (df['ZBM Name'] == name)])
                 print(f"      - '{name}' ({count} records)")
     
-    # Get unique ZBMs - Use ONLY ZBM Terr Code for uniqueness
-    zbm_groups = df.groupby('ZBM Terr Code').agg({
-        'ZBM Name': 'first',  # Take the first name (you could also use 'last' or mode)
-        'ZBM EMAIL_ID': lambda x: x.dropna().iloc[0] if len(x.dropna()) > 0 else None
-    }).reset_index()
-    
-    zbms = zbm_groups.sort_values('ZBM Terr Code')
-    
-    print(f"\n📋 Creating {len(zbms)} consolidated files (one per unique ZBM Terr Code)")
-    
+    # Split the frame per ZBM Terr Code once - the loop below walks the
+    # ready groups instead of re-masking the whole frame for each ZBM
+    zbm_grouped = df.groupby('ZBM Terr Code', sort=True, observed=True)
+
+    # Name and first non-null email per ZBM code, indexed for direct lookup
+    # (groupby 'first' skips nulls, matching the old dropna().iloc[0])
+    zbm_meta = zbm_grouped.agg({'ZBM Name': 'first', 'ZBM EMAIL_ID': 'first'})
+
+    print(f"\n📋 Creating {len(zbm_meta)} consolidated files (one per unique ZBM Terr Code)")
+
     # Debug: Show ZBM list
     print(f"🔍 Unique ZBMs to be processed:")
-    for _, zbm in zbms.iterrows():
-        zbm_count = len(df[df['ZBM Terr Code'] == zbm['ZBM Terr Code']])
-        print(f"   {zbm['ZBM Terr Code']} - {zbm['ZBM Name']} ({zbm_count} records)")
+    for zbm_code, zbm_count in zbm_grouped.size().items():
+        print(f"   {zbm_code} - {zbm_meta.at[zbm_code, 'ZBM Name']} ({zbm_count} records)")
     
     # Create output directory
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -155,21 +290,15 @@ def create_zbm_consolidated_files():
     os.makedirs(output_dir, exist_ok=True)
     print(f"📁 Created output directory: {output_dir}")
     
-    # Process each ZBM
-    for _, zbm_row in zbms.iterrows():
-        zbm_code = zbm_row['ZBM Terr Code']
-        zbm_name = zbm_row['ZBM Name']
-        zbm_email = zbm_row['ZBM EMAIL_ID']
-        
+    # Process each ZBM straight off the groupby - every group is non-empty
+    # by construction. The Excel writes are queued here and fanned out to
+    # worker processes after the loop, since each file is independent
+    write_jobs = []
+    for zbm_code, zbm_data in zbm_grouped:
+        zbm_name = zbm_meta.at[zbm_code, 'ZBM Name']
+        zbm_email = zbm_meta.at[zbm_code, 'ZBM EMAIL_ID']
+
         print(f"\n🔄 Processing ZBM: {zbm_code} - {zbm_name}")
-        
-        # Filter data for this ZBM
-        zbm_data = df[df['ZBM Terr Code'] == zbm_code]
-        
-        if len(zbm_data) == 0:
-            print(f"⚠️ No data found for ZBM: {zbm_code}")
-            continue
-        
         print(f"   📊 Found {len(zbm_data)} records for this ZBM")
         
         # Select only the required columns for consolidated file
@@ -185,90 +314,45 @@ def create_zbm_consolidated_files():
         # Create consolidated data for this ZBM
         consolidated_data = zbm_data[consolidated_columns].copy()
         
-        # Format date columns to show only date without time
-        date_columns = ['Date', 'Invoice Date', 'Dispatch Date', 'Delivery Date']
-        for col in date_columns:
-            if col in consolidated_data.columns:
-                # Convert to datetime and format as date only
-                consolidated_data[col] = pd.to_datetime(consolidated_data[col], errors='coerce').dt.date
-                print(f"   📅 Formatted {col} column to date-only format")
-        
+        # Date columns were parsed at load time; the Excel writer applies
+        # the date-only display format below
+
         # Sort by ABM Terr Code and then by Assigned Request Ids
         consolidated_data = consolidated_data.sort_values(['ABM Terr Code', 'Assigned Request Ids'])
         
-        # Create filename
-        safe_zbm_name = str(zbm_name).replace(' ', '_').replace('/', '_').replace('\\', '_')
-        filename = f"ZBM_Consolidated_{zbm_code}_{safe_zbm_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        filepath = os.path.join(output_dir, filename)
-        
-        # Save to Excel
-        try:
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                consolidated_data.to_excel(writer, sheet_name='Consolidated Data', index=False)
-                
-                # Get the workbook and worksheet
-                workbook = writer.book
-                worksheet = writer.sheets['Consolidated Data']
-                
-                # Auto-adjust column widths
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-                
-                # Add header formatting
-                from openpyxl.styles import Font, PatternFill, Alignment
-                
-                header_font = Font(bold=True, name='Arial', size=10)
-                header_fill = PatternFill(start_color='D3D3D3', end_color='D3D3D3', fill_type='solid')
-                header_alignment = Alignment(horizontal='center', vertical='center')
-                
-                for cell in worksheet[1]:
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.alignment = header_alignment
-                
-                # Format date columns in Excel
-                date_columns_excel = ['Date', 'Invoice Date', 'Dispatch Date', 'Delivery Date']
-                for col_name in date_columns_excel:
-                    if col_name in consolidated_data.columns:
-                        # Find the column index
-                        col_idx = consolidated_data.columns.get_loc(col_name) + 1  # +1 because Excel is 1-indexed
-                        col_letter = worksheet.cell(row=1, column=col_idx).column_letter
-                        
-                        # Apply date format to all data cells in this column
-                        for row in range(2, worksheet.max_row + 1):  # Start from row 2 (skip header)
-                            cell = worksheet.cell(row=row, column=col_idx)
-                            if cell.value is not None:
-                                cell.number_format = 'dd/mm/yyyy'  # Date format without time
-            
-            print(f"   ✅ Created: {filename}")
-            print(f"   📊 Records in consolidated file: {len(consolidated_data)}")
-            
-            # Show sample of data
-            print(f"   📋 Sample data (first 3 rows):")
-            for idx, (_, row) in enumerate(consolidated_data.head(3).iterrows()):
-                print(f"      Row {idx+1}: {row['ABM Name']} - {row['Assigned Request Ids']} - {row['Request Status']} -> {row['Final Status']} - RTO: {row['Rto Reason']}")
-            
-            # Debug: Check RTO Reason data in this ZBM's consolidated file
-            rto_reason_data = consolidated_data['Rto Reason'].value_counts(dropna=False)
-            print(f"   🔍 RTO Reason data in consolidated file:")
-            print(f"      Non-null RTO Reasons: {consolidated_data['Rto Reason'].notna().sum()}")
-            for reason, count in rto_reason_data.head(5).items():
-                print(f"      '{reason}': {count}")
-            
-        except Exception as e:
-            print(f"   ❌ Error creating consolidated file for {zbm_code}: {e}")
-            continue
-    
-    print(f"\n🎉 Successfully created {len(zbms)} consolidated files in directory: {output_dir}")
+        # Queue the Excel write for the process pool below
+        write_jobs.append((zbm_code, zbm_name, consolidated_data))
+        print(f"   📊 Records in consolidated file: {len(consolidated_data)}")
+
+        # Show sample of data
+        print(f"   📋 Sample data (first 3 rows):")
+        for idx, (_, row) in enumerate(consolidated_data.head(3).iterrows()):
+            print(f"      Row {idx+1}: {row['ABM Name']} - {row['Assigned Request Ids']} - {row['Request Status']} -> {row['Final Status']} - RTO: {row['Rto Reason']}")
+
+        # Debug: Check RTO Reason data in this ZBM's consolidated file
+        rto_reason_data = consolidated_data['Rto Reason'].value_counts(dropna=False)
+        print(f"   🔍 RTO Reason data in consolidated file:")
+        print(f"      Non-null RTO Reasons: {consolidated_data['Rto Reason'].notna().sum()}")
+        for reason, count in rto_reason_data.head(5).items():
+            print(f"      '{reason}': {count}")
+
+    # Write all the workbooks concurrently - each job is a self-contained
+    # slice, so the files scale across cores; the shared timestamp keeps
+    # every filename of this run consistent
+    print(f"\n💾 Writing {len(write_jobs)} consolidated files in parallel...")
+    created = 0
+    with ProcessPoolExecutor() as executor:
+        futures = {executor.submit(write_zbm_consolidated_file, zbm_code, zbm_name,
+                                   consolidated_data, output_dir, timestamp): zbm_code
+                   for zbm_code, zbm_name, consolidated_data in write_jobs}
+        for future, zbm_code in futures.items():
+            try:
+                future.result()
+                created += 1
+            except Exception as e:
+                print(f"   ❌ Error creating consolidated file for {zbm_code}: {e}")
+
+    print(f"\n🎉 Successfully created {created} consolidated files in directory: {output_dir}")
     print(f"📁 Each file contains detailed data for that specific ZBM only")
     print(f"📧 These files are ready to be attached to ZBM emails")
 
@@ -2,35 +2,65 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
 from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+from openpyxl.styles import Font, Alignment, Border, Side, PatternFill, NamedStyle
 from copy import copy as copy_style
+import logging
 import warnings
 
 # Suppress FutureWarning for groupby operations
 warnings.filterwarnings('ignore', category=FutureWarning, module='pandas')
 
-def create_zbm_hierarchical_reports():
+# Progress goes through logging so the per-ZBM / per-ABM diagnostics only
+# hit stdout when explicitly requested via LOGLEVEL=DEBUG
+logging.basicConfig(level=os.getenv('LOGLEVEL', 'INFO'), format='%(message)s')
+log = logging.getLogger(__name__)
+
+# Column order of the per-ZBM summary frame; rows are appended as plain
+# tuples in this order
+SUMMARY_COLS = ('Area Name', 'ABM Name', 'Unique TBMs', 'Unique HCPs',
+                'Requests Raised', 'Request Cancelled Out of Stock',
+                'Action Pending at HO', 'Sent to HUB', 'Pending for Invoicing',
+                'Pending for Dispatch', 'Requests Dispatched', 'Delivered',
+                'Dispatched In Transit', 'RTO', 'Incomplete Address',
+                'Doctor Non Contactable', 'Doctor Refused to Accept', 'Hold Delivery')
+
+def read_excel_fast(path, **kwargs):
+    """Read an Excel file with the fastest engine available.
+
+    Prefers the Rust-based calamine engine; falls back to openpyxl in
+    read-only mode, which streams rows instead of building the full cell
+    object tree.
     """
-    Create separate ZBM reports showing ABM hierarchy with perfect tallies
-    Each ZBM gets a report showing all ABMs under them
+    try:
+        return pd.read_excel(path, engine='calamine', **kwargs)
+    except ImportError:
+        return pd.read_excel(path, engine='openpyxl',
+                             engine_kwargs={'read_only': True, 'data_only': True},
+                             **kwargs)
+
+def load_master_with_final_answer():
+    """Read the master tracker, validate columns and merge Final Answer.
+
+    Returns the prepared dataframe, or None when the source files cannot
+    be processed.
     """
-    
-    print("🔄 Starting ZBM Hierarchical Reports Creation...")
-    
+
     # Read master tracker data from Excel file
-    print("📖 Reading Demo File 1.xlsx...")
+    log.info("📖 Reading Demo File 1.xlsx...")
     try:
-        df = pd.read_excel('Demo File 1.xlsx')
-        print(f"✅ Successfully loaded {len(df)} records")
+        df = read_excel_fast('Demo File 1.xlsx')
+        log.info(f"✅ Successfully loaded {len(df)} records")
     except Exception as e:
-        print(f"❌ Error reading file: {e}")
-        return
-    
-    print(f"📋 Columns in file: {list(df.columns)}")
+        log.error(f"❌ Error reading file: {e}")
+        return None
+
+    log.debug(f"📋 Columns in file: {list(df.columns)}")
     
     # Basic data preparation
-    print("🧹 Preparing data...")
+    log.info("🧹 Preparing data...")
     
     # Ensure required columns exist
     required_columns = ['ZBM Terr Code', 'ZBM Name', 'ZBM EMAIL_ID',
@@ -39,37 +69,47 @@ def create_zbm_hierarchical_reports():
                         'Doctor: Customer Code', 'Assigned Request Ids', 'Request Status', 'Rto Reason']
     missing = [c for c in required_columns if c not in df.columns]
     if missing:
-        print(f"❌ Missing required columns: {missing}")
-        return
+        log.error(f"❌ Missing required columns: {missing}")
+        return None
+
+    # Heavily grouped/filtered string columns become categoricals once, so
+    # the groupbys and comparisons below work on integer codes instead of
+    # hashing Python strings
+    for col in ['ZBM Terr Code', 'ZBM Name', 'ABM Terr Code', 'ABM Name', 'TBM HQ', 'Rto Reason']:
+        df[col] = df[col].astype('category')
 
-    print(f"📊 Total rows in file: {len(df)}")
-    print(f"📊 Unique Request IDs in raw data: {df['Assigned Request Ids'].nunique()}")
-    print(f"📊 Unique ZBM codes in raw data: {df['ZBM Terr Code'].nunique()}")
+    log.info(f"📊 Total rows in file: {len(df)}")
+    log.info(f"📊 Unique Request IDs in raw data: {df['Assigned Request Ids'].nunique()}")
+    log.info(f"📊 Unique ZBM codes in raw data: {df['ZBM Terr Code'].nunique()}")
 
     # Compute Final Answer per unique request id using rules from logic.xlsx
-    print("🧠 Computing final status per unique Request Id using rules...")
+    log.info("🧠 Computing final status per unique Request Id using rules...")
     try:
-        xls_rules = pd.ExcelFile('logic.xlsx')
-        sheet2 = pd.read_excel(xls_rules, 'Sheet2')
+        sheet2 = read_excel_fast('logic.xlsx', sheet_name='Sheet2')
 
-        def normalize(text):
-            return str(text).strip().casefold()
+        # Build the rules dict without iterrows - normalize every condition
+        # cell through the vectorized string path, then zip plain arrays
+        answers = sheet2['Final Answer'].to_numpy()
+        cond_arr = (sheet2.drop(columns='Final Answer').astype('string')
+                    .apply(lambda s: s.str.strip().str.casefold()).to_numpy())
 
+        # Rules keyed by frozenset - hash-stable no matter what container
+        # the groupby agg below hands back (a sorted-tuple key breaks when
+        # the agg result arrives as an ndarray)
         rules = {}
-        for _, row in sheet2.iterrows():
-            statuses = [normalize(s) for s in row.drop('Final Answer').dropna().tolist()]
-            statuses = tuple(sorted(set(statuses)))
-            rules[statuses] = row['Final Answer']
-
-        # Group statuses by request id from master data
-        grouped = df.groupby('Assigned Request Ids')['Request Status'].apply(list).reset_index()
+        for cond_row, answer in zip(cond_arr, answers):
+            statuses = frozenset(s for s in cond_row if pd.notna(s))
+            rules[statuses] = answer
 
-        def get_final_answer(status_list):
-            key = tuple(sorted(set(normalize(s) for s in status_list)))
-            return rules.get(key, '❌ No matching rule')
+        # Normalize the whole status column once with the vectorized string
+        # kernels instead of calling normalize() per row inside the groupby
+        df['_status_n'] = df['Request Status'].astype('string').str.strip().str.casefold()
 
-        grouped['Request Status'] = grouped['Request Status'].apply(lambda lst: sorted(set(lst), key=str))
-        grouped['Final Answer'] = grouped['Request Status'].apply(get_final_answer)
+        # Collapse each request id to its status frozenset, then the rule
+        # match is a plain map lookup
+        grouped = df.groupby('Assigned Request Ids')['_status_n'].agg(
+            frozenset).reset_index(name='status_key')
+        grouped['Final Answer'] = grouped['status_key'].map(rules).fillna('❌ No matching rule')
 
         # Merge Final Answer back to main dataframe
         df = df.merge(grouped[['Assigned Request Ids', 'Final Answer']], on='Assigned Request Ids', how='left')
@@ -77,21 +117,62 @@ def create_zbm_hierarchical_reports():
         # Check for unmapped requests
         unmapped_count = (df['Final Answer'] == '❌ No matching rule').sum()
         if unmapped_count > 0:
-            print(f"⚠️ WARNING: {unmapped_count} rows have no matching rule in logic.xlsx")
-            print(f"   Unique Request IDs with no rule: {df[df['Final Answer'] == '❌ No matching rule']['Assigned Request Ids'].nunique()}")
+            log.warning(f"⚠️ WARNING: {unmapped_count} rows have no matching rule in logic.xlsx")
+            log.warning(f"   Unique Request IDs with no rule: {df[df['Final Answer'] == '❌ No matching rule']['Assigned Request Ids'].nunique()}")
             
     except Exception as e:
-        print(f"❌ Error computing final status from logic.xlsx: {e}")
-        return
-    
+        log.error(f"❌ Error computing final status from logic.xlsx: {e}")
+        return None
+
+    return df
+
+def create_zbm_hierarchical_reports():
+    """
+    Create separate ZBM reports showing ABM hierarchy with perfect tallies
+    Each ZBM gets a report showing all ABMs under them
+    """
+
+    log.info("🔄 Starting ZBM Hierarchical Reports Creation...")
+
+    # Reuse the prepared frame from the previous run when neither source
+    # workbook changed - re-parsing the tracker and re-running the rules is
+    # the slowest part of startup on repeat runs
+    cache_path = os.path.join('.cache', 'zbm_master.parquet')
+    df = None
+    try:
+        if os.path.exists(cache_path):
+            cache_mtime = os.path.getmtime(cache_path)
+            if (cache_mtime > os.path.getmtime('Demo File 1.xlsx') and
+                    cache_mtime > os.path.getmtime('logic.xlsx')):
+                df = pd.read_parquet(cache_path)
+                log.info(f"✅ Reusing prepared data from {cache_path} ({len(df)} records)")
+    except Exception:
+        df = None
+
+    if df is None:
+        df = load_master_with_final_answer()
+        if df is None:
+            return
+
+        # Caching is best effort - without a parquet engine installed the
+        # next run simply re-parses the Excel sources
+        try:
+            os.makedirs('.cache', exist_ok=True)
+            df.to_parquet(cache_path)
+        except Exception:
+            pass
+
     # Deduplicate at Request ID + ZBM + ABM level to get correct counts
-    print("🔧 Deduplicating data at Request ID + ZBM + ABM level...")
+    log.info("🔧 Deduplicating data at Request ID + ZBM + ABM level...")
     
     # Store original data for validation
     original_request_count = df['Assigned Request Ids'].nunique()
     
-    # Deduplicate: Each unique (Request ID + ZBM + ABM) combination should appear once
-    df_dedup = df.groupby(['Assigned Request Ids', 'ZBM Terr Code', 'ABM Terr Code']).agg({
+    # Deduplicate: Each unique (Request ID + ZBM + ABM) combination should
+    # appear once. Built-in 'first' for every column keeps the whole agg on
+    # pandas' Cython fast path, and sort=False skips a key sort nothing
+    # downstream relies on
+    agg_dict = {
         'ZBM Name': 'first',
         'ZBM EMAIL_ID': 'first',
         'ABM Name': 'first',
@@ -101,38 +182,123 @@ def create_zbm_hierarchical_reports():
         'Doctor: Customer Code': 'first',
         'Final Answer': 'first',
         'Rto Reason': 'first',
-        'ABM HQ': 'first' if 'ABM HQ' in df.columns else lambda x: None
-    }).reset_index()
-    
-    print(f"📊 Deduplicated from {len(df)} rows to {len(df_dedup)} unique (Request ID + ZBM + ABM) combinations")
-    print(f"📊 Unique Request IDs after dedup: {df_dedup['Assigned Request Ids'].nunique()}")
+    }
+    if 'ABM HQ' in df.columns:
+        agg_dict['ABM HQ'] = 'first'
+
+    df_dedup = df.groupby(['Assigned Request Ids', 'ZBM Terr Code', 'ABM Terr Code'],
+                          sort=False, observed=True).agg(agg_dict).reset_index()
+
+    # Sources without the column still yield a uniform frame downstream
+    if 'ABM HQ' not in df_dedup.columns:
+        df_dedup['ABM HQ'] = None
     
+    log.info(f"📊 Deduplicated from {len(df)} rows to {len(df_dedup)} unique (Request ID + ZBM + ABM) combinations")
+    log.info(f"📊 Unique Request IDs after dedup: {df_dedup['Assigned Request Ids'].nunique()}")
+
+    # Classify Rto Reason in a single regex pass - one extract over the
+    # column replaces the three separate substring scans
+    rto_col = df_dedup['Rto Reason'].astype(str).str.strip().str.lower()
+    rto_pattern = r'(incomplete address|refused to accept|non contactable)'
+    df_dedup['_rto_cat'] = rto_col.str.extract(rto_pattern, expand=False).astype('category')
+
+    # Category-code Final Answer so the bucket counting below hashes small
+    # integer codes instead of Python strings
+    df_dedup['Final Answer'] = df_dedup['Final Answer'].astype('category')
+
+    # Reason category restricted to Return requests, computed once; each
+    # ABM tallies it with a single value_counts instead of and-ing a
+    # Return mask into three equality scans
+    df_dedup['_rto_ret'] = df_dedup['_rto_cat'].where(df_dedup['Final Answer'] == 'Return')
+
+    # Count Final Answer buckets for every (ZBM, ABM) pair in one vectorized
+    # pass - the ABM loop below reads precomputed rows instead of re-masking
+    # the frame a dozen times per ABM
+    bucket_counts = (df_dedup.groupby(['ZBM Terr Code', 'ABM Terr Code', 'ABM Name'], observed=True)['Final Answer']
+                     .value_counts().unstack(fill_value=0))
+
+    # Unique TBM / HCP counts for every (ZBM, ABM) pair in one partitioned
+    # aggregation instead of two nunique calls per ABM slice
+    uniq_counts = df_dedup.groupby(['ZBM Terr Code', 'ABM Terr Code', 'ABM Name'], observed=True).agg(
+        unique_tbms=('TBM EMAIL_ID', 'nunique'),
+        unique_hcps=('Doctor: Customer Code', 'nunique'))
+
+    # Reduce the bucket matrix to every report section for all (ZBM, ABM)
+    # pairs in one shot - the loops below only read finished rows out of
+    # this table, they no longer aggregate anything themselves
+    def sum_statuses(statuses):
+        return bucket_counts.reindex(columns=statuses, fill_value=0).sum(axis=1).astype(int)
+
+    rto_reasons = (df_dedup.groupby(['ZBM Terr Code', 'ABM Terr Code', 'ABM Name'], observed=True)['_rto_ret']
+                   .value_counts().unstack(fill_value=0)
+                   .reindex(index=bucket_counts.index,
+                            columns=['incomplete address', 'refused to accept', 'non contactable'],
+                            fill_value=0).astype(int))
+
+    section_table = pd.DataFrame({
+        'a_cancelled': sum_statuses(['Out of stock', 'On hold', 'Not permitted']),
+        'b_pending_ho': sum_statuses(['Request Raised', 'Action pending / In Process At HO']),
+        'd_invoicing': sum_statuses(['Action pending / In Process At Hub']),
+        'e_dispatch': sum_statuses(['Dispatch  Pending', 'Dispatch Pending']),
+        'g_delivered': sum_statuses(['Delivered']),
+        'h_transit': sum_statuses(['Dispatched & In Transit']),
+        'i_rto': sum_statuses(['Return']),
+        'incomplete': rto_reasons['incomplete address'],
+        'refused': rto_reasons['refused to accept'],
+        'non_contactable': rto_reasons['non contactable'],
+    })
+
+    # Returns without a recorded reason go to Non Contactable as catch-all
+    section_table['no_reason'] = (section_table['i_rto']
+                                  - rto_reasons.sum(axis=1)).clip(lower=0)
+    section_table['non_contactable'] += section_table['no_reason']
+
+    # Derived fields: F = G+H+I, C = D+E+F, Total = A+B+C
+    section_table['f_dispatched'] = (section_table['g_delivered'] + section_table['h_transit']
+                                     + section_table['i_rto'])
+    section_table['c_sent_to_hub'] = (section_table['d_invoicing'] + section_table['e_dispatch']
+                                      + section_table['f_dispatched'])
+    section_table['total_calc'] = (section_table['a_cancelled'] + section_table['b_pending_ho']
+                                   + section_table['c_sent_to_hub'])
+
+    # Partition the deduplicated frame once - the per-ZBM and per-ABM slices
+    # below become dict lookups instead of repeated full-frame boolean scans
+    zbm_groups = {code: group for code, group in
+                  df_dedup.groupby('ZBM Terr Code', sort=False, observed=True)}
+    abm_groups = {key: group for key, group in
+                  df_dedup.groupby(['ZBM Terr Code', 'ABM Terr Code', 'ABM Name'], sort=False, observed=True)}
+
     # Get unique ZBMs using mode (most frequent) for name/email
-    zbms = df_dedup.groupby('ZBM Terr Code').agg({
+    zbms = df_dedup.groupby('ZBM Terr Code', observed=True).agg({
         'ZBM Name': lambda x: x.mode()[0] if len(x.mode()) > 0 else x.iloc[0],
         'ZBM EMAIL_ID': lambda x: x.mode()[0] if len(x.mode()) > 0 else x.iloc[0]
     }).reset_index().sort_values('ZBM Terr Code')
     
-    print(f"📋 Found {len(zbms)} unique ZBMs")
+    log.info(f"📋 Found {len(zbms)} unique ZBMs")
     
     # Debug: Show first few ZBMs and their ABMs
-    print("\n🔍 ZBM-ABM Mapping (first 5):")
+    log.debug("\n🔍 ZBM-ABM Mapping (first 5):")
     for idx, (_, zbm_row) in enumerate(zbms.head(5).iterrows()):
         zbm_code = zbm_row['ZBM Terr Code']
         zbm_name = zbm_row['ZBM Name']
-        zbm_data_temp = df_dedup[df_dedup['ZBM Terr Code'] == zbm_code]
+        zbm_data_temp = zbm_groups[zbm_code]
         abms_temp = zbm_data_temp[['ABM Terr Code', 'ABM Name']].drop_duplicates()
         requests_temp = zbm_data_temp['Assigned Request Ids'].nunique()
-        print(f"   {idx+1}. {zbm_code} ({zbm_name}): {len(abms_temp)} ABMs, {requests_temp} requests")
+        log.debug(f"   {idx+1}. {zbm_code} ({zbm_name}): {len(abms_temp)} ABMs, {requests_temp} requests")
     
     # Create output directory
     timestamp = datetime.now().strftime('%Y%m%d')
     output_dir = f"ZBM_Reports_{timestamp}"
     os.makedirs(output_dir, exist_ok=True)
-    print(f"📁 Created output directory: {output_dir}")
+    log.info(f"📁 Created output directory: {output_dir}")
+
+    # Read the summary template from disk once - each ZBM report reloads it
+    # from the in-memory bytes instead of hitting the file per ZBM
+    with open('zbm_summary.xlsx', 'rb') as f:
+        template_bytes = f.read()
     
     # Process each ZBM
-    file_count = 0
+    report_jobs = []
     total_validation_errors = 0
     
     for _, zbm_row in zbms.iterrows():
@@ -140,24 +306,26 @@ def create_zbm_hierarchical_reports():
         zbm_name = zbm_row['ZBM Name']
         zbm_email = zbm_row['ZBM EMAIL_ID']
         
-        print(f"\n🔄 Processing ZBM: {zbm_code} - {zbm_name}")
+        log.debug(f"\n🔄 Processing ZBM: {zbm_code} - {zbm_name}")
         
-        # Filter data for this ZBM (using deduplicated data)
-        zbm_data = df_dedup[df_dedup['ZBM Terr Code'] == zbm_code].copy()
-        
-        if len(zbm_data) == 0:
-            print(f"⚠️ No data found for ZBM: {zbm_code}")
+        # Look up data for this ZBM (using deduplicated data)
+        zbm_data = zbm_groups.get(zbm_code)
+
+        if zbm_data is None or len(zbm_data) == 0:
+            log.warning(f"⚠️ No data found for ZBM: {zbm_code}")
             continue
         
-        # Get unique ABMs under this ZBM
-        abms = zbm_data.groupby(['ABM Terr Code', 'ABM Name']).agg({
-            'ABM EMAIL_ID': lambda x: x.mode()[0] if len(x.mode()) > 0 else x.iloc[0],
+        # Get unique ABMs under this ZBM - email is effectively one-to-one
+        # with the ABM code after dedup, so 'first' matches what the old
+        # mode() lambda returned without leaving the Cython agg path
+        abms = zbm_data.groupby(['ABM Terr Code', 'ABM Name'], sort=False, observed=True).agg({
+            'ABM EMAIL_ID': 'first',
             'TBM HQ': 'first',
-            'ABM HQ': 'first' if 'ABM HQ' in zbm_data.columns else lambda x: None
+            'ABM HQ': 'first'
         }).reset_index()
         
         abms = abms.sort_values('ABM Terr Code')
-        print(f"   📊 Found {len(abms)} ABMs under this ZBM")
+        log.debug(f"   📊 Found {len(abms)} ABMs under this ZBM")
         
         # Create summary data for this ZBM
         summary_data = []
@@ -168,112 +336,66 @@ def create_zbm_hierarchical_reports():
             abm_email = abm_row['ABM EMAIL_ID']
             tbm_hq = abm_row['TBM HQ']
             
-            # Filter data for this specific ABM (using deduplicated data)
-            abm_data = zbm_data[(zbm_data['ABM Terr Code'] == abm_code) & 
-                               (zbm_data['ABM Name'] == abm_name)].copy()
+            # Look up data for this specific ABM (using deduplicated data)
+            abm_data = abm_groups[(zbm_code, abm_code, abm_name)]
             
             # Calculate all metrics using deduplicated data
-            unique_tbms = abm_data['TBM EMAIL_ID'].nunique()
-            unique_hcps = abm_data['Doctor: Customer Code'].nunique()
+            unique_tbms = int(uniq_counts.at[(zbm_code, abm_code, abm_name), 'unique_tbms'])
+            unique_hcps = int(uniq_counts.at[(zbm_code, abm_code, abm_name), 'unique_hcps'])
             unique_requests = len(abm_data)
-            
-            # === SECTION A: Request Cancelled Out of Stock ===
-            # Final Answer: Out of stock, On hold, Not permitted
-            ho_statuses = ['Out of stock', 'On hold', 'Not permitted']
-            request_cancelled_out_of_stock = (abm_data['Final Answer'].isin(ho_statuses)).sum()
-            
-            # === SECTION B: Action Pending at HO ===
-            # Final Answer: Request Raised, Action pending / In Process At HO
-            pending_statuses = ['Request Raised', 'Action pending / In Process At HO']
-            action_pending_at_ho = (abm_data['Final Answer'].isin(pending_statuses)).sum()
-            
-            # === SECTION D: Pending for Invoicing ===
-            # Final Answer: Action pending / In Process At Hub
-            hub_pending_statuses = ['Action pending / In Process At Hub']
-            pending_for_invoicing = (abm_data['Final Answer'].isin(hub_pending_statuses)).sum()
-            
-            # === SECTION E: Pending for Dispatch ===
-            # Final Answer: Dispatch Pending
-            dispatch_pending_statuses = ['Dispatch  Pending', 'Dispatch Pending']
-            pending_for_dispatch = (abm_data['Final Answer'].isin(dispatch_pending_statuses)).sum()
-            
-            # === SECTION G: Delivered ===
-            # Final Answer: Delivered
-            delivered_statuses = ['Delivered']
-            delivered = (abm_data['Final Answer'].isin(delivered_statuses)).sum()
-            
-            # === SECTION H: Dispatched & In Transit ===
-            # Final Answer: Dispatched & In Transit
-            transit_statuses = ['Dispatched & In Transit']
-            dispatched_in_transit = (abm_data['Final Answer'].isin(transit_statuses)).sum()
-            
-            # === SECTION I: RTO (Return to Origin) ===
-            # RTO Calculation - ONLY count requests with "Return" Final Answer
-            # Priority-Based Reason Assignment: 1) Incomplete Address, 2) Doctor Refused, 3) Doctor Non Contactable
-            
-            # ONLY count requests with "Return" Final Answer as RTO
-            has_return_status = abm_data['Final Answer'] == 'Return'
-            rto_total = has_return_status.sum()
-            
-            # RTO Reasons - Check Rto Reason column (only for Return requests)
-            rto_col = abm_data['Rto Reason'].astype(str).str.strip().str.lower()
-            has_incomplete_address = rto_col.str.contains('incomplete address', na=False, regex=False)
-            has_refused_to_accept = rto_col.str.contains('refused to accept', na=False, regex=False)
-            has_non_contactable = rto_col.str.contains('non contactable', na=False, regex=False)
-            
-            # Any RTO reason present
-            has_any_rto_reason = has_incomplete_address | has_non_contactable | has_refused_to_accept
-            
-            # Assign each RTO request to ONE category based on priority
-            # Only count requests that have Return status
-            # Priority: 1) Incomplete Address, 2) Doctor Refused, 3) Doctor Non Contactable
-            incomplete_address = (has_return_status & has_incomplete_address).sum()
-            doctor_refused_to_accept = (has_return_status & ~has_incomplete_address & has_refused_to_accept).sum()
-            doctor_non_contactable = (has_return_status & ~has_incomplete_address & ~has_refused_to_accept & has_non_contactable).sum()
-            
-            # Handle Return status without RTO reason - add to Non Contactable as catch-all
-            return_no_reason = (has_return_status & ~has_any_rto_reason).sum()
-            if return_no_reason > 0:
-                doctor_non_contactable += return_no_reason
-            
+
+            # Every section (A/B/D/E/G/H/I), the RTO reason split and the
+            # derived C/F/Total for this pair are already computed in the
+            # vectorized section table
+            sec = section_table.loc[(zbm_code, abm_code, abm_name)]
+            request_cancelled_out_of_stock = int(sec['a_cancelled'])
+            action_pending_at_ho = int(sec['b_pending_ho'])
+            pending_for_invoicing = int(sec['d_invoicing'])
+            pending_for_dispatch = int(sec['e_dispatch'])
+            delivered = int(sec['g_delivered'])
+            dispatched_in_transit = int(sec['h_transit'])
+            rto_total = int(sec['i_rto'])
+            incomplete_address = int(sec['incomplete'])
+            doctor_refused_to_accept = int(sec['refused'])
+            doctor_non_contactable = int(sec['non_contactable'])
+            return_no_reason = int(sec['no_reason'])
+            requests_dispatched = int(sec['f_dispatched'])
+            sent_to_hub = int(sec['c_sent_to_hub'])
+            requests_raised_calc = int(sec['total_calc'])
+
             # Validate RTO breakdown
             rto_reasons_sum = incomplete_address + doctor_non_contactable + doctor_refused_to_accept
             if rto_reasons_sum != rto_total:
-                print(f"      ⚠️ RTO Breakdown mismatch for ABM {abm_code}:")
-                print(f"         RTO Total: {rto_total}, Reasons Sum: {rto_reasons_sum}")
-                print(f"         Incomplete: {incomplete_address}, Refused: {doctor_refused_to_accept}, Non-contactable: {doctor_non_contactable}")
-                print(f"         Return without reason: {return_no_reason}")
-            
-            # === CALCULATED FIELDS ===
-            # F = Requests Dispatched = G + H + I
-            requests_dispatched = delivered + dispatched_in_transit + rto_total
-            
-            # C = Sent to HUB = D + E + F
-            sent_to_hub = pending_for_invoicing + pending_for_dispatch + requests_dispatched
-            
-            # Total = Requests Raised = A + B + C
-            requests_raised_calc = request_cancelled_out_of_stock + action_pending_at_ho + sent_to_hub
-            
+                log.warning(f"      ⚠️ RTO Breakdown mismatch for ABM {abm_code}:")
+                log.warning(f"         RTO Total: {rto_total}, Reasons Sum: {rto_reasons_sum}")
+                log.warning(f"         Incomplete: {incomplete_address}, Refused: {doctor_refused_to_accept}, Non-contactable: {doctor_non_contactable}")
+                log.warning(f"         Return without reason: {return_no_reason}")
+
             # Hold Delivery (not used in current logic)
             hold_delivery = 0
-            
+
             # Check for unmapped requests
-            all_mapped_statuses = ho_statuses + pending_statuses + hub_pending_statuses + dispatch_pending_statuses + delivered_statuses + transit_statuses + ['Return']
-            mapped = abm_data['Final Answer'].isin(all_mapped_statuses)
-            unmapped_count = (~mapped).sum()
-            
+            abm_counts = bucket_counts.loc[(zbm_code, abm_code, abm_name)]
+            all_mapped_statuses = ['Out of stock', 'On hold', 'Not permitted',
+                                   'Request Raised', 'Action pending / In Process At HO',
+                                   'Action pending / In Process At Hub',
+                                   'Dispatch  Pending', 'Dispatch Pending',
+                                   'Delivered', 'Dispatched & In Transit', 'Return']
+            unmapped = abm_counts.drop(labels=[s for s in all_mapped_statuses if s in abm_counts.index])
+            unmapped = unmapped[unmapped > 0]
+            unmapped_count = int(unmapped.sum())
+
             if unmapped_count > 0:
-                print(f"      ⚠️ {unmapped_count} unmapped requests for ABM {abm_code}")
-                unmapped_statuses = abm_data[~mapped]['Final Answer'].value_counts().to_dict()
-                print(f"         Unmapped statuses: {unmapped_statuses}")
+                log.warning(f"      ⚠️ {unmapped_count} unmapped requests for ABM {abm_code}")
+                log.warning(f"         Unmapped statuses: {unmapped.to_dict()}")
             
             # Verify tally
             if requests_raised_calc != unique_requests:
-                print(f"      ❌ TALLY MISMATCH for ABM {abm_code}:")
-                print(f"         Calculated: {requests_raised_calc}, Actual: {unique_requests}, Diff: {unique_requests - requests_raised_calc}")
-                print(f"         A={request_cancelled_out_of_stock}, B={action_pending_at_ho}, C={sent_to_hub}")
-                print(f"         D={pending_for_invoicing}, E={pending_for_dispatch}, F={requests_dispatched}")
-                print(f"         G={delivered}, H={dispatched_in_transit}, I={rto_total}")
+                log.error(f"      ❌ TALLY MISMATCH for ABM {abm_code}:")
+                log.error(f"         Calculated: {requests_raised_calc}, Actual: {unique_requests}, Diff: {unique_requests - requests_raised_calc}")
+                log.error(f"         A={request_cancelled_out_of_stock}, B={action_pending_at_ho}, C={sent_to_hub}")
+                log.error(f"         D={pending_for_invoicing}, E={pending_for_dispatch}, F={requests_dispatched}")
+                log.error(f"         G={delivered}, H={dispatched_in_transit}, I={rto_total}")
                 total_validation_errors += 1
             
             # Use actual unique request count to ensure accuracy
@@ -286,71 +408,72 @@ def create_zbm_hierarchical_reports():
                 abm_hq = tbm_hq
             area_name = f"{abm_code} - {abm_hq}"
             
-            summary_data.append({
-                'Area Name': area_name,
-                'ABM Name': abm_name,
-                'Unique TBMs': unique_tbms,
-                'Unique HCPs': unique_hcps,
-                'Requests Raised': requests_raised,
-                'Request Cancelled Out of Stock': request_cancelled_out_of_stock,
-                'Action Pending at HO': action_pending_at_ho,
-                'Sent to HUB': sent_to_hub,
-                'Pending for Invoicing': pending_for_invoicing,
-                'Pending for Dispatch': pending_for_dispatch,
-                'Requests Dispatched': requests_dispatched,
-                'Delivered': delivered,
-                'Dispatched In Transit': dispatched_in_transit,
-                'RTO': rto_total,
-                'Incomplete Address': incomplete_address,
-                'Doctor Non Contactable': doctor_non_contactable,
-                'Doctor Refused to Accept': doctor_refused_to_accept,
-                'Hold Delivery': hold_delivery
-            })
-        
+            summary_data.append((
+                area_name, abm_name, unique_tbms, unique_hcps,
+                requests_raised, request_cancelled_out_of_stock,
+                action_pending_at_ho, sent_to_hub, pending_for_invoicing,
+                pending_for_dispatch, requests_dispatched, delivered,
+                dispatched_in_transit, rto_total, incomplete_address,
+                doctor_non_contactable, doctor_refused_to_accept, hold_delivery
+            ))
+
         # Create DataFrame for this ZBM
-        zbm_summary_df = pd.DataFrame(summary_data)
+        zbm_summary_df = pd.DataFrame.from_records(summary_data, columns=list(SUMMARY_COLS))
         
         # Validate ZBM total
         zbm_total_requests = zbm_data['Assigned Request Ids'].nunique()
         zbm_summary_total = zbm_summary_df['Requests Raised'].sum()
         
         if zbm_total_requests != zbm_summary_total:
-            print(f"   ⚠️ WARNING: ZBM {zbm_code} total mismatch!")
-            print(f"      Actual unique requests: {zbm_total_requests}")
-            print(f"      Summary total: {zbm_summary_total}")
-            print(f"      Difference: {zbm_summary_total - zbm_total_requests}")
+            log.warning(f"   ⚠️ WARNING: ZBM {zbm_code} total mismatch!")
+            log.warning(f"      Actual unique requests: {zbm_total_requests}")
+            log.warning(f"      Summary total: {zbm_summary_total}")
+            log.warning(f"      Difference: {zbm_summary_total - zbm_total_requests}")
         
-        # Create Excel file for this ZBM
-        create_zbm_excel_report(zbm_code, zbm_name, zbm_email, zbm_summary_df, output_dir)
-        file_count += 1
-    
-    print(f"\n🎉 Successfully created {file_count} ZBM reports in directory: {output_dir}")
-    print(f"📊 Total ZBMs processed: {file_count}")
+        # Queue the Excel file for this ZBM
+        report_jobs.append((zbm_code, zbm_name, zbm_email, zbm_summary_df))
+
+    # Write the per-ZBM workbooks in parallel - each job only needs its own
+    # summary frame plus the shared template bytes, so the files are
+    # completely independent of each other
+    file_count = 0
+    with ProcessPoolExecutor() as executor:
+        futures = [executor.submit(create_zbm_excel_report, zbm_code, zbm_name, zbm_email,
+                                   zbm_summary_df, output_dir, template_bytes, timestamp)
+                   for zbm_code, zbm_name, zbm_email, zbm_summary_df in report_jobs]
+        for future in futures:
+            future.result()
+            file_count += 1
+
+    log.info(f"\n🎉 Successfully created {file_count} ZBM reports in directory: {output_dir}")
+    log.info(f"📊 Total ZBMs processed: {file_count}")
     if total_validation_errors > 0:
-        print(f"⚠️ WARNING: {total_validation_errors} ABMs had validation errors")
+        log.warning(f"⚠️ WARNING: {total_validation_errors} ABMs had validation errors")
     else:
-        print(f"✅ All tallies match perfectly!")
+        log.info(f"✅ All tallies match perfectly!")
 
-def create_zbm_excel_report(zbm_code, zbm_name, zbm_email, summary_df, output_dir):
+def create_zbm_excel_report(zbm_code, zbm_name, zbm_email, summary_df, output_dir, template_bytes, date_tag):
     """Create Excel report for a specific ZBM with perfect formatting"""
-    
+
     try:
-        # Load template
-        wb = load_workbook('zbm_summary.xlsx')
+        # Load template from the bytes read once by the caller
+        wb = load_workbook(BytesIO(template_bytes), keep_vba=False)
         ws = wb['ZBM']
 
+        # Precompute a (row, col) -> top-left value lookup so every header
+        # probe doesn't rescan the full merged-range list
+        merged_lookup = {}
+        for merged_range in ws.merged_cells.ranges:
+            top_left_value = ws.cell(row=merged_range.min_row, column=merged_range.min_col).value
+            for m_row in range(merged_range.min_row, merged_range.max_row + 1):
+                for m_col in range(merged_range.min_col, merged_range.max_col + 1):
+                    merged_lookup[(m_row, m_col)] = top_left_value
+
         def get_cell_value_handling_merged(row, col):
             """Get cell value even if it's part of a merged cell"""
-            cell = ws.cell(row=row, column=col)
-            
-            # Check if this cell is part of a merged range
-            for merged_range in ws.merged_cells.ranges:
-                if cell.coordinate in merged_range:
-                    # Get the top-left cell of the merged range
-                    top_left_cell = ws.cell(row=merged_range.min_row, column=merged_range.min_col)
-                    return top_left_cell.value
-            
-            return cell.value
+            if (row, col) in merged_lookup:
+                return merged_lookup[(row, col)]
+            return ws.cell(row=row, column=col).value
         
         # Search for header row
         header_row = None
@@ -412,91 +535,74 @@ def create_zbm_excel_report(zbm_code, zbm_name, zbm_email, summary_df, output_di
                 elif 'Hold Delivery' in header_str:
                     column_mapping['Hold Delivery'] = col_idx
         
-        # Clear existing data rows
+        # One named style cloned from the template's first data row replaces
+        # the per-cell font/alignment/border/fill deepcopies - assigning a
+        # registered style is just a string lookup in openpyxl
+        template_cell = ws.cell(row=data_start_row, column=1)
+        data_style = NamedStyle(name='zbm_data')
+        data_style.font = copy_style(template_cell.font)
+        data_style.alignment = copy_style(template_cell.alignment)
+        data_style.border = copy_style(template_cell.border)
+        data_style.fill = copy_style(template_cell.fill)
+        data_style.number_format = template_cell.number_format
+        wb.add_named_style(data_style)
+
+        # Clear existing data rows in one call instead of blanking
+        # thousands of cells individually (the style above is captured
+        # before the template rows go away)
         max_clear_rows = max(len(summary_df) + 10, 50)
-        for r in range(data_start_row, data_start_row + max_clear_rows):
-            for c in range(1, ws.max_column + 1):
-                try:
-                    cell = ws.cell(row=r, column=c)
-                    cell.value = None
-                except:
-                    pass
-
-        def copy_row_style(src_row_idx, dst_row_idx):
-            """Copy formatting from source row to destination row"""
-            for c in range(1, ws.max_column + 1):
-                try:
-                    src = ws.cell(row=src_row_idx, column=c)
-                    dst = ws.cell(row=dst_row_idx, column=c)
-                    
-                    if src.font:
-                        dst.font = copy_style(src.font)
-                    if src.alignment:
-                        dst.alignment = copy_style(src.alignment)
-                    if src.border:
-                        dst.border = copy_style(src.border)
-                    if src.fill:
-                        dst.fill = copy_style(src.fill)
-                    dst.number_format = src.number_format
-                except:
-                    pass
-
-        # Write data rows
-        template_data_row = data_start_row
-        for i in range(len(summary_df)):
+        ws.delete_rows(data_start_row, max_clear_rows)
+
+        # Write data rows - resolve each summary column's template position
+        # once, then stream the rows as plain tuples instead of label-based
+        # .iloc lookups per cell
+        write_columns = [(col_name, col_idx) for col_name, col_idx in column_mapping.items()
+                         if col_name in summary_df.columns]
+        row_values = summary_df[[name for name, _ in write_columns]].itertuples(index=False, name=None)
+        for i, values in enumerate(row_values):
             target_row = data_start_row + i
-            copy_row_style(template_data_row, target_row)
-            
-            for col_name, col_idx in column_mapping.items():
-                if col_name in summary_df.columns:
-                    value = summary_df.iloc[i][col_name]
-                    
-                    try:
-                        cell = ws.cell(row=target_row, column=col_idx)
-                        cell.value = value
-                        
-                        if isinstance(value, (int, float)) and not pd.isna(value):
-                            cell.number_format = '0'
-                    except:
-                        pass
+
+            for (col_name, col_idx), value in zip(write_columns, values):
+                cell = ws.cell(row=target_row, column=col_idx)
+                cell.style = 'zbm_data'
+                cell.value = value
+
+                if isinstance(value, (int, float)) and not pd.isna(value):
+                    cell.number_format = '0'
 
         # Add total row
         total_row = data_start_row + len(summary_df)
-        copy_row_style(template_data_row, total_row)
-        
+
         if 'ABM Name' in column_mapping:
-            try:
-                cell = ws.cell(row=total_row, column=column_mapping['ABM Name'])
-                cell.value = "Total"
-                cell.font = Font(bold=True, name='Arial', size=10)
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-            except:
-                pass
+            cell = ws.cell(row=total_row, column=column_mapping['ABM Name'])
+            cell.style = 'zbm_data'
+            cell.value = "Total"
+            cell.font = Font(bold=True, name='Arial', size=10)
+            cell.alignment = Alignment(horizontal='center', vertical='center')
         
-        # Calculate and write totals
+        # Calculate all totals in one vectorized reduction instead of a
+        # Series sum per column
+        totals = summary_df.select_dtypes('number').sum()
+
         for col_name, col_idx in column_mapping.items():
-            if col_name in summary_df.columns and col_name not in ['Area Name', 'ABM Name']:
-                total_value = int(summary_df[col_name].sum())
-                
-                try:
-                    cell = ws.cell(row=total_row, column=col_idx)
-                    cell.value = total_value
-                    cell.font = Font(bold=True, name='Arial', size=10)
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                    cell.number_format = '0'
-                except:
-                    pass
+            if col_name in totals.index:
+                cell = ws.cell(row=total_row, column=col_idx)
+                cell.style = 'zbm_data'
+                cell.value = int(totals[col_name])
+                cell.font = Font(bold=True, name='Arial', size=10)
+                cell.alignment = Alignment(horizontal='center', vertical='center')
+                cell.number_format = '0'
 
         # Save file
         safe_zbm_name = str(zbm_name).replace(' ', '_').replace('/', '_').replace('\\', '_')
-        filename = f"ZBM_Summary_{zbm_code}_{safe_zbm_name}_{datetime.now().strftime('%Y%m%d')}.xlsx"
+        filename = f"ZBM_Summary_{zbm_code}_{safe_zbm_name}_{date_tag}.xlsx"
         filepath = os.path.join(output_dir, filename)
         
         wb.save(filepath)
-        print(f"   ✅ Created: {filename}")
+        log.debug(f"   ✅ Created: {filename}")
         
     except Exception as e:
-        print(f"   ❌ Error creating Excel report for {zbm_code}: {e}")
+        log.error(f"   ❌ Error creating Excel report for {zbm_code}: {e}")
         import traceback
         traceback.print_exc()
 